@@ -16,11 +16,12 @@ from dotenv import load_dotenv
 from datetime import datetime, timedelta
 import json
 from typing import List, Dict, Optional
-from playwright.async_api import async_playwright
 from deepgram import DeepgramClient, PrerecordedOptions
 from openai import AsyncOpenAI
 from supabase import create_client
 
+from src.utils.browser_pool import get_browser, close_browser
+
 load_dotenv()
 
 # Initialize clients
@@ -163,109 +164,109 @@ class HybridPipeline:
     
     async def download_audio_via_browser(self, dc_call_id: str, call_sid: str) -> Optional[str]:
         """Use browser automation to download audio for a specific call"""
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context()
-            page = await context.new_page()
+        # One shared browser for every call; each call gets its own context
+        browser = await get_browser()
+        context = await browser.new_context()
+        page = await context.new_page()
+        
+        audio_url = None
+        download_path = f"downloads/{call_sid}.mp3"
+        
+        # Monitor network for audio URLs
+        async def handle_response(response):
+            nonlocal audio_url
+            if 'cloudfront' in response.url and '.mp3' in response.url:
+                audio_url = response.url
+                print(f"   🎵 Found audio URL: {audio_url}")
+        
+        page.on("response", handle_response)
+        
+        try:
+            # Login
+            print(f"   🔐 Logging into dashboard...")
+            await page.goto(self.dashboard_url)
+            await page.wait_for_timeout(2000)
             
-            audio_url = None
-            download_path = f"downloads/{call_sid}.mp3"
+            await page.fill('input[placeholder="User Name"]', self.username)
+            await page.fill('input[placeholder="Password"]', self.password)
+            await page.click('button:has-text("Sign in")')
+            await page.wait_for_timeout(3000)
             
-            # Monitor network for audio URLs
-            async def handle_response(response):
-                nonlocal audio_url
-                if 'cloudfront' in response.url and '.mp3' in response.url:
-                    audio_url = response.url
-                    print(f"   🎵 Found audio URL: {audio_url}")
+            # Navigate directly to call review page
+            review_url = f"{self.dashboard_url}/userPortal/calls/review?callId={dc_call_id}"
+            print(f"   📞 Navigating to: {review_url}")
+            await page.goto(review_url)
+            await page.wait_for_timeout(5000)
             
-            page.on("response", handle_response)
+            # Wait for page to load completely
+            await page.wait_for_load_state('networkidle', timeout=10000)
             
+            # Try multiple approaches to trigger audio load
             try:
-                # Login
-                print(f"   🔐 Logging into dashboard...")
-                await page.goto(self.dashboard_url)
-                await page.wait_for_timeout(2000)
-                
-                await page.fill('input[placeholder="User Name"]', self.username)
-                await page.fill('input[placeholder="Password"]', self.password)
-                await page.click('button:has-text("Sign in")')
-                await page.wait_for_timeout(3000)
-                
-                # Navigate directly to call review page
-                review_url = f"{self.dashboard_url}/userPortal/calls/review?callId={dc_call_id}"
-                print(f"   📞 Navigating to: {review_url}")
-                await page.goto(review_url)
-                await page.wait_for_timeout(5000)
-                
-                # Wait for page to load completely
-                await page.wait_for_load_state('networkidle', timeout=10000)
-                
-                # Try multiple approaches to trigger audio load
-                try:
-                    # Look for play button with various selectors
-                    play_selectors = [
-                        'button:has-text("Play")',
-                        'button[aria-label*="play" i]',
-                        'button[title*="play" i]',
-                        '.play-button',
-                        '[class*="play"]',
-                        'svg[class*="play"]',
-                        'i[class*="play"]',
-                        'button svg',
-                        'button i'
-                    ]
-                    
-                    for selector in play_selectors:
-                        try:
-                            if await page.locator(selector).count() > 0:
-                                await page.click(selector, timeout=2000)
-                                print(f"   ▶️  Clicked play button: {selector}")
-                                break
-                        except:
-                            continue
-                except:
-                    pass
-                
-                # Also try to find audio element directly
-                try:
-                    if await page.locator('audio').count() > 0:
-                        # Get audio source
-                        audio_src = await page.locator('audio').get_attribute('src')
-                        if audio_src and not audio_url:
-                            audio_url = audio_src
-                            print(f"   🎵 Found audio src: {audio_url}")
-                except:
-                    pass
+                # Look for play button with various selectors
+                play_selectors = [
+                    'button:has-text("Play")',
+                    'button[aria-label*="play" i]',
+                    'button[title*="play" i]',
+                    '.play-button',
+                    '[class*="play"]',
+                    'svg[class*="play"]',
+                    'i[class*="play"]',
+                    'button svg',
+                    'button i'
+                ]
                 
-                # Wait for potential lazy loading
-                await page.wait_for_timeout(5000)
+                for selector in play_selectors:
+                    try:
+                        if await page.locator(selector).count() > 0:
+                            await page.click(selector, timeout=2000)
+                            print(f"   ▶️  Clicked play button: {selector}")
+                            break
+                    except:
+                        continue
+            except:
+                pass
+            
+            # Also try to find audio element directly
+            try:
+                if await page.locator('audio').count() > 0:
+                    # Get audio source
+                    audio_src = await page.locator('audio').get_attribute('src')
+                    if audio_src and not audio_url:
+                        audio_url = audio_src
+                        print(f"   🎵 Found audio src: {audio_url}")
+            except:
+                pass
+            
+            # Wait for potential lazy loading
+            await page.wait_for_timeout(5000)
+            
+            # Scroll to trigger any lazy loading
+            await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+            await page.wait_for_timeout(2000)
+            
+            # Download audio if URL was found
+            if audio_url:
+                print(f"   📥 Downloading audio...")
                 
-                # Scroll to trigger any lazy loading
-                await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                await page.wait_for_timeout(2000)
+                # Download with browser's session cookies
+                async with page.context.request as request:
+                    response = await request.get(audio_url)
+                    if response.status == 200:
+                        os.makedirs('downloads', exist_ok=True)
+                        with open(download_path, 'wb') as f:
+                            f.write(await response.body())
+                        print(f"   ✅ Audio saved to: {download_path}")
+                        return download_path
+            else:
+                print(f"   ⚠️  No audio URL found for call {call_sid}")
                 
-                # Download audio if URL was found
-                if audio_url:
-                    print(f"   📥 Downloading audio...")
-                    
-                    # Download with browser's session cookies
-                    async with page.context.request as request:
-                        response = await request.get(audio_url)
-                        if response.status == 200:
-                            os.makedirs('downloads', exist_ok=True)
-                            with open(download_path, 'wb') as f:
-                                f.write(await response.body())
-                            print(f"   ✅ Audio saved to: {download_path}")
-                            return download_path
-                else:
-                    print(f"   ⚠️  No audio URL found for call {call_sid}")
-                    
-            except Exception as e:
-                print(f"   ❌ Browser error: {e}")
-            finally:
-                await browser.close()
-            
-            return None
+        except Exception as e:
+            print(f"   ❌ Browser error: {e}")
+        finally:
+            await context.close()
+        
+        return None
     
     async def transcribe_with_deepgram(self, audio_file: str) -> Dict:
         """Transcribe audio using Deepgram"""
@@ -453,6 +454,7 @@ Respond in JSON format."""
             print(f"❌ Pipeline error: {e}")
         finally:
             await self.client.aclose()
+            await close_browser()
 
 
 async def main():
@@ -92,6 +92,9 @@ async def test_full_pipeline():
         print("\n📥 STEP 3: Downloading audio files...")
         print("-" * 60)
         
+        # Download statuses, written together once the loop is done
+        status_updates = []
+        
         for i, call_data in enumerate(test_calls, 1):
             print(f"\n[{i}/{len(test_calls)}] Processing {call_data['call_id']}")
             print(f"    Customer: {call_data['customer_name']}")
@@ -101,7 +104,8 @@ async def test_full_pipeline():
             
             try:
                 # Download using browser automation
-                audio_path = await browser_scraper.download_audio_for_call(call_data)
+                audio_path, status_row = await browser_scraper.download_audio_for_call(call_data)
+                status_updates.append(status_row)
                 
                 if audio_path and os.path.exists(audio_path):
                     call_data['audio_file'] = audio_path
@@ -132,6 +136,8 @@ async def test_full_pipeline():
                 })
                 logger.error(f"    ❌ Error: {e}")
         
+        await browser_scraper.flush_status_updates(status_updates)
+        
         # Close browser
         await browser_scraper.close_browser()
         
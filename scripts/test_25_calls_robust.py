@@ -81,10 +81,14 @@ class RobustCallProcessor:
             # Login to dashboard once
             await self.browser_scraper.login_to_dashboard()
             
+            # Download statuses, written together once the retries are done
+            status_updates = []
+            
             for i, call in enumerate(self.failed_downloads, 1):
                 print(f"\n[{i}/{len(self.failed_downloads)}] Retrying {call['call_id']}...")
                 
-                audio_path = await self.browser_scraper.download_audio_for_call(call)
+                audio_path, status_row = await self.browser_scraper.download_audio_for_call(call)
+                status_updates.append(status_row)
                 
                 if audio_path and os.path.exists(audio_path):
                     self.download_success += 1
@@ -92,6 +96,8 @@ class RobustCallProcessor:
                 else:
                     self.download_failures += 1
                     print(f"❌ Browser download failed")
+            
+            await self.browser_scraper.flush_status_updates(status_updates)
         
         # Step 4: Process all downloaded audio files
         print(f"\n🎯 STEP 4: Processing {self.download_success} audio files...")
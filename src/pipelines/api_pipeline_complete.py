@@ -11,6 +11,7 @@ This combines:
 """
 
 import asyncio
+import aiofiles
 import httpx
 import os
 from dotenv import load_dotenv
@@ -32,6 +33,9 @@ supabase = create_client(
     os.getenv("SUPABASE_KEY")
 )
 
+# Audio is streamed to disk in chunks of this size
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
 
 class CompletePipeline:
     def __init__(self):
@@ -179,26 +183,30 @@ class CompletePipeline:
         
         return None
     
+    async def _stream_to_file(self, url: str, output_path: str) -> int:
+        """Stream a URL to disk chunk by chunk; returns the HTTP status"""
+        async with self.client.stream('GET', url, follow_redirects=True) as response:
+            if response.status_code == 200:
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                async with aiofiles.open(output_path, 'wb') as f:
+                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        await f.write(chunk)
+            return response.status_code
+    
     async def download_audio(self, url: str, output_path: str) -> bool:
         """Download audio file from URL"""
         try:
             print(f"📥 Downloading audio from: {url}")
-            response = await self.client.get(url, follow_redirects=True)
+            status = await self._stream_to_file(url, output_path)
             
-            if response.status_code == 200:
-                os.makedirs(os.path.dirname(output_path), exist_ok=True)
-                with open(output_path, 'wb') as f:
-                    f.write(response.content)
+            if status == 200:
                 print(f"✅ Audio saved to: {output_path}")
                 return True
             else:
-                print(f"⚠️  Failed to download audio: {response.status_code}")
+                print(f"⚠️  Failed to download audio: {status}")
                 # Try alternative URL patterns
                 alt_url = url.replace('/RE', '/').replace('Recordings/', 'recordings/')
-                response = await self.client.get(alt_url, follow_redirects=True)
-                if response.status_code == 200:
-                    with open(output_path, 'wb') as f:
-                        f.write(response.content)
+                if await self._stream_to_file(alt_url, output_path) == 200:
                     print(f"✅ Audio saved using alternative URL")
                     return True
                 return False
@@ -369,7 +377,7 @@ Respond in JSON format."""
         
         try:
             # Check if exists
-            existing = supabase.table('recordings').select("*").eq('call_id', call_data.get('CallSid')).execute()
+            existing = supabase.table('recordings').select('call_id').eq('call_id', call_data.get('CallSid')).limit(1).execute()
             if existing.data:
                 result = supabase.table('recordings').update(recording_record).eq('call_id', call_data.get('CallSid')).execute()
             else:
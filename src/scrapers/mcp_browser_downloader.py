@@ -5,15 +5,84 @@ Uses MCP Playwright tools to download audio files from Digital Concierge
 
 import asyncio
 import os
+import re
 import logging
 from typing import Optional, Dict, List
 from pathlib import Path
 import json
 import time
+import random
 from datetime import datetime
+from urllib.parse import urlparse
+import aiofiles
+import aiofiles.os
+import httpx
 
 logger = logging.getLogger(__name__)
 
+# Upper bound for DOM-state waits, in seconds
+WAIT_TIMEOUT = 15
+WAIT_POLL_INTERVAL = 0.1
+
+# Per-call retry budget and HTTP timeouts, so one bad call can't stall a batch
+MAX_ATTEMPTS = 3
+HTTP_TIMEOUT = httpx.Timeout(connect=5, read=30, write=10, pool=5)
+
+# Origin serving call recordings
+CLOUDFRONT_URL = "https://d3vneafawyd5u6.cloudfront.net"
+
+# Network requests that carry the call recording
+_AUDIO_URL_RE = re.compile(r'(?:\.mp3\b|cloudfront\.net.*\.mp3|/recording/|/audio/)', re.I)
+
+# Matches any of the username field variants seen on the sign-in page
+USERNAME_SELECTOR = (
+    ':is(input[name="username"], input[placeholder*="User"], input[type="text"])'
+    ':not([type="password"])'
+)
+
+
+# Partial downloads older than this are assumed abandoned
+STALE_PARTIAL_SECONDS = 3600
+
+
+class TransientDownloadError(Exception):
+    """A per-call failure worth retrying (row not rendered, URL not captured, ...)"""
+
+
+def partial_path(output_path) -> Path:
+    """Where a download is written before being atomically moved to output_path"""
+    output_path = Path(output_path)
+    return output_path.parent / "tmp" / f"{output_path.name}.part"
+
+
+def validator_path(part: Path) -> Path:
+    """Sidecar holding the ETag/Last-Modified of the object a partial came from"""
+    return part.with_name(part.name + '.validator')
+
+
+def cleanup_stale_partials(downloads_dir: Path):
+    """Remove partial downloads left behind by crashed runs"""
+    cutoff = time.time() - STALE_PARTIAL_SECONDS
+    for part in downloads_dir.rglob('*.part'):
+        if part.stat().st_mtime < cutoff:
+            part.unlink(missing_ok=True)
+            validator_path(part).unlink(missing_ok=True)
+
+
+def _resume_validator(response: httpx.Response) -> Optional[str]:
+    """A value usable in If-Range: a strong ETag, else Last-Modified"""
+    etag = response.headers.get('etag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return response.headers.get('last-modified')
+
+
+async def _discard_partial(tmp: Path):
+    """Remove a partial download and its validator"""
+    for path in (tmp, validator_path(tmp)):
+        if await aiofiles.os.path.exists(path):
+            await aiofiles.os.remove(path)
+
 
 class MCPBrowserDownloader:
     """Real MCP browser automation for audio downloads"""
@@ -22,25 +91,105 @@ class MCPBrowserDownloader:
         self.dashboard_url = "https://autoservice.digitalconcierge.io"
         self.downloads_dir = Path("downloads")
         self.downloads_dir.mkdir(exist_ok=True)
+        (self.downloads_dir / "tmp").mkdir(exist_ok=True)
+        cleanup_stale_partials(self.downloads_dir)
         self.is_logged_in = False
         self.browser_state = {
             "cookies": None,
-            "auth_token": None
+            "auth_token": None,
+            "api_base": None
         }
+        # Call SIDs already on disk, snapshotted once per batch
+        self.downloaded_sids: Optional[set] = None
+        # How much of the current page's network log has been scanned
+        self.network_log_offset = 0
+        # The MCP browser is a single page, so only one call may drive it at a time
+        self.browser_lock = asyncio.Lock()
+        # Shared client so downloads to the same CloudFront host reuse connections
+        self.http = httpx.AsyncClient(
+            http2=True,
+            timeout=HTTP_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=50)
+        )
+        
+    async def aclose(self):
+        """Close the shared HTTP client"""
+        await self.http.aclose()
+        
+    async def wait_for_selector(self, selector: str, timeout: float = WAIT_TIMEOUT) -> bool:
+        """Wait until an element matching selector is present, instead of sleeping a fixed time"""
+        script = f"() => document.querySelector({json.dumps(selector)}) !== null"
+        deadline = time.monotonic() + timeout
+        
+        while time.monotonic() < deadline:
+            if await mcp__playwright__browser_evaluate(function=script):
+                return True
+            await asyncio.sleep(WAIT_POLL_INTERVAL)
+            
+        logger.warning(f"⏱️ Timed out waiting for {selector}")
+        return False
+    
+    async def wait_for_url_change(self, old_url: str, timeout: float = WAIT_TIMEOUT) -> bool:
+        """Wait until the page navigates away from old_url"""
+        deadline = time.monotonic() + timeout
+        
+        while time.monotonic() < deadline:
+            if await mcp__playwright__browser_evaluate(function="() => location.href") != old_url:
+                return True
+            await asyncio.sleep(WAIT_POLL_INTERVAL)
+            
+        logger.warning(f"⏱️ Timed out waiting to leave {old_url}")
+        return False
         
     async def initialize_browser(self):
         """Initialize browser with download settings"""
         logger.info("🌐 Initializing MCP browser...")
         
         # Navigate to initial page to establish session
-        await mcp__playwright__browser_navigate(url=self.dashboard_url)
-        await mcp__playwright__browser_wait_for(time=2)
+        await self.navigate(self.dashboard_url)
+        await self.wait_for_selector('body')
         
         # Set viewport for better compatibility
         await mcp__playwright__browser_resize(width=1280, height=800)
         
         logger.info("✅ Browser initialized")
         
+    async def warmup_connections(self):
+        """Prime DNS, TLS and the keep-alive pool for the recordings origin"""
+        try:
+            await self.http.head(f"{CLOUDFRONT_URL}/", timeout=5)
+            logger.info("🔥 Warmed up connection to recordings origin")
+        except httpx.HTTPError as e:
+            # Status doesn't matter, only the established connection does
+            logger.debug(f"Warmup request failed: {e}")
+        
+    async def navigate(self, url: str):
+        """Navigate the browser, starting the network log over with the new page"""
+        await mcp__playwright__browser_navigate(url=url)
+        self.network_log_offset = 0
+        
+    async def new_network_requests(self) -> List[Dict]:
+        """Return only the network requests logged since the previous call"""
+        requests = await mcp__playwright__browser_network_requests()
+        
+        # The log only grows until the page reloads on its own
+        if len(requests) < self.network_log_offset:
+            self.network_log_offset = 0
+        
+        # Keep only the fields callers use so full request/response metadata
+        # isn't held for the rest of the call
+        new_requests = [
+            {
+                'url': req.get('url', ''),
+                'headers': {k: v for k, v in req.get('headers', {}).items() if k == 'x-access-token'}
+            }
+            for req in requests[self.network_log_offset:]
+        ]
+        self.network_log_offset = len(requests)
+        del requests
+        return new_requests
+        
     async def login_to_dashboard(self) -> bool:
         """Login to Digital Concierge dashboard"""
         
@@ -53,12 +202,8 @@ class MCPBrowserDownloader:
             
             # Navigate to login page
             login_url = f"{self.dashboard_url}/userPortal/sign-in"
-            await mcp__playwright__browser_navigate(url=login_url)
-            await mcp__playwright__browser_wait_for(time=3)
-            
-            # Take snapshot to identify elements
-            snapshot = await mcp__playwright__browser_snapshot()
-            logger.info(f"📸 Login page snapshot taken")
+            await self.navigate(login_url)
+            await self.wait_for_selector('input[name="username"], input[type="password"]')
             
             # Get credentials
             username = os.getenv("DASHBOARD_USERNAME")
@@ -67,24 +212,13 @@ class MCPBrowserDownloader:
             if not username or not password:
                 raise ValueError("Dashboard credentials not set in environment")
             
-            # Type username
-            # Look for username input - try multiple selectors
-            username_typed = False
-            for selector in ['input[name="username"]', 'input[placeholder*="User"]', 'input[type="text"]']:
-                try:
-                    await mcp__playwright__browser_type(
-                        element="Username field",
-                        ref=selector,
-                        text=username
-                    )
-                    username_typed = True
-                    logger.info(f"✅ Username entered using {selector}")
-                    break
-                except:
-                    continue
-                    
-            if not username_typed:
-                raise Exception("Could not find username field")
+            # Type username - one composite selector covers the known field variants
+            await mcp__playwright__browser_type(
+                element="Username field",
+                ref=USERNAME_SELECTOR,
+                text=username
+            )
+            logger.info("✅ Username entered")
             
             # Type password
             await mcp__playwright__browser_type(
@@ -101,28 +235,36 @@ class MCPBrowserDownloader:
             )
             
             # Wait for login to complete
-            await mcp__playwright__browser_wait_for(time=5)
+            await self.wait_for_url_change(login_url)
             
             # Check if login successful by looking for calls page elements
             try:
-                await mcp__playwright__browser_navigate(url=f"{self.dashboard_url}/userPortal/admin/calls")
-                await mcp__playwright__browser_wait_for(time=3)
+                await self.navigate(f"{self.dashboard_url}/userPortal/admin/calls")
+                await self.wait_for_selector('tbody tr')
                 
-                # Take screenshot to verify
-                await mcp__playwright__browser_take_screenshot(
-                    filename="login_success.png"
-                )
+                # Screenshot is only useful when debugging the login flow
+                if logger.isEnabledFor(logging.DEBUG):
+                    await mcp__playwright__browser_take_screenshot(
+                        filename="login_success.png"
+                    )
                 
                 self.is_logged_in = True
                 logger.info("✅ Login successful!")
                 
                 # Store auth token from network requests
-                requests = await mcp__playwright__browser_network_requests()
+                requests = await self.new_network_requests()
                 for req in requests:
                     headers = req.get('headers', {})
                     if 'x-access-token' in headers:
                         self.browser_state['auth_token'] = headers['x-access-token']
                         logger.info("🔑 Captured auth token")
+                    
+                    # Remember the API host behind the calls-list XHR so later
+                    # calls can resolve audio URLs without the browser
+                    if '/call/list' in req.get('url', ''):
+                        parsed = urlparse(req['url'])
+                        self.browser_state['api_base'] = f"{parsed.scheme}://{parsed.netloc}"
+                        logger.info(f"🔗 Captured API base: {self.browser_state['api_base']}")
                         
                 return True
                 
@@ -134,147 +276,163 @@ class MCPBrowserDownloader:
             logger.error(f"Login failed: {e}")
             return False
     
+    async def resolve_audio_url_fast(self, call_sid: str) -> Optional[str]:
+        """Resolve the audio URL straight from the JSON API, skipping the browser"""
+        
+        api_base = self.browser_state.get('api_base')
+        auth_token = self.browser_state.get('auth_token')
+        if not api_base or not auth_token:
+            return None
+        
+        try:
+            response = await self.http.get(
+                f"{api_base}/call/{call_sid}",
+                headers={'x-access-token': auth_token}
+            )
+            
+            if response.status_code != 200:
+                logger.debug(f"Fast path lookup failed for {call_sid}: {response.status_code}")
+                return None
+            
+            call = response.json()
+            audio_url = call.get('recordingUrl')
+            if not audio_url and call.get('recordingId'):
+                audio_url = f"{CLOUDFRONT_URL}/Recordings/{call['recordingId']}.mp3"
+            return audio_url
+            
+        except Exception as e:
+            logger.debug(f"Fast path lookup error for {call_sid}: {e}")
+            return None
+    
     async def navigate_to_call_and_download(self, call_data: Dict) -> Optional[str]:
-        """Navigate to specific call and download audio"""
+        """Navigate to specific call and download audio, retrying transient failures"""
         
         call_sid = call_data['call_id']
         output_path = self.downloads_dir / f"{call_sid}.mp3"
         
         # Skip if already downloaded
-        if output_path.exists():
+        if self.downloaded_sids is not None:
+            already_downloaded = call_sid in self.downloaded_sids
+        else:
+            already_downloaded = await asyncio.to_thread(output_path.exists)
+        
+        if already_downloaded:
             logger.info(f"✅ Audio already exists: {output_path}")
             return str(output_path)
+        
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                result = await self._download_call_audio(call_sid, output_path)
+                if self.downloaded_sids is not None:
+                    self.downloaded_sids.add(call_sid)
+                return result
+            except TransientDownloadError as e:
+                if attempt == MAX_ATTEMPTS - 1:
+                    logger.error(f"❌ Giving up on {call_sid} after {MAX_ATTEMPTS} attempts: {e}")
+                    return None
+                delay = 2 ** attempt + random.random()
+                logger.warning(f"⚠️ Attempt {attempt + 1} for {call_sid} failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            except Exception as e:
+                logger.error(f"Error downloading audio for {call_sid}: {e}")
+                return None
+    
+    async def _download_call_audio(self, call_sid: str, output_path: Path) -> str:
+        """Single attempt at locating and downloading a call's audio"""
+        
+        logger.info(f"📞 Processing call: {call_sid}")
+        
+        # Fast path: resolve the audio URL via the API and download directly
+        fast_url = await self.resolve_audio_url_fast(call_sid)
+        if fast_url and await download_audio_direct(
+            fast_url, str(output_path), self.browser_state['auth_token'], client=self.http
+        ):
+            logger.info(f"⚡ Downloaded via direct API path: {output_path}")
+            return str(output_path)
+        
+        # Fall back to the browser flow, one call at a time so concurrent
+        # calls don't read each other's network requests
+        async with self.browser_lock:
+            audio_url = await self._find_audio_url_in_browser(call_sid)
+        
+        if audio_url and audio_url == fast_url:
+            # Already tried (and failed) this attempt; leave it to the next one
+            raise TransientDownloadError("audio download failed")
+        
+        if audio_url:
+            # Download the audio file
+            logger.info(f"📥 Downloading audio to: {output_path}")
             
-        try:
-            logger.info(f"📞 Processing call: {call_sid}")
-            
-            # Navigate to calls page with search
-            calls_url = f"{self.dashboard_url}/userPortal/admin/calls"
-            await mcp__playwright__browser_navigate(url=calls_url)
-            await mcp__playwright__browser_wait_for(time=3)
-            
-            # Search for specific call
-            # Try to find search input
-            await mcp__playwright__browser_type(
-                element="Search input",
-                ref='input[placeholder*="Search"]',
-                text=call_sid
-            )
-            
-            # Wait for results
-            await mcp__playwright__browser_wait_for(time=2)
-            
-            # Take snapshot to find call row
-            snapshot = await mcp__playwright__browser_snapshot()
-            
-            # Click on the call row to open modal
-            # Try different selectors
-            clicked = False
-            for selector in [
-                f'tr:has-text("{call_sid}")',
-                f'[data-call-id="{call_sid}"]',
-                f'td:has-text("{call_sid}")'
-            ]:
-                try:
-                    await mcp__playwright__browser_click(
-                        element=f"Call row for {call_sid}",
-                        ref=selector
-                    )
-                    clicked = True
-                    logger.info(f"✅ Clicked call row using {selector}")
-                    break
-                except:
-                    continue
-                    
-            if not clicked:
-                # Try clicking first row if specific call not found
-                await mcp__playwright__browser_click(
-                    element="First call row",
-                    ref='tbody tr:first-child'
-                )
-                logger.warning("Clicked first row as fallback")
-            
-            # Wait for modal to open
-            await mcp__playwright__browser_wait_for(time=3)
-            
-            # Capture network requests to find audio URL
-            requests = await mcp__playwright__browser_network_requests()
+            if await download_audio_direct(
+                audio_url, str(output_path), self.browser_state['auth_token'], client=self.http
+            ):
+                return str(output_path)
             
-            audio_url = None
-            for req in requests:
-                url = req.get('url', '')
-                # Look for audio URLs
-                if any(pattern in url for pattern in ['.mp3', 'cloudfront.net', 'recording', 'audio']):
-                    if 'mp3' in url or 'audio' in url:
-                        audio_url = url
-                        logger.info(f"🎵 Found audio URL: {url[:80]}...")
-                        break
+            raise TransientDownloadError("audio download failed")
             
-            if not audio_url:
-                # Try alternative: look for audio element in page
-                # Execute JavaScript to find audio source
-                logger.info("Searching for audio element in page...")
-                
-                # Use Puppeteer evaluate since we have it
-                try:
-                    audio_src = await mcp__puppeteer__puppeteer_evaluate(
-                        script="""
-                        const audio = document.querySelector('audio');
-                        audio ? audio.src : null;
-                        """
-                    )
-                    if audio_src:
-                        audio_url = audio_src
-                        logger.info(f"🎵 Found audio URL from element: {audio_url[:80]}...")
-                except:
-                    pass
+        raise TransientDownloadError("no audio URL found")
+    
+    async def _find_audio_url_in_browser(self, call_sid: str) -> Optional[str]:
+        """Open a call's modal in the dashboard and return its audio URL"""
+        
+        # Navigate to calls page with search
+        calls_url = f"{self.dashboard_url}/userPortal/admin/calls"
+        await self.navigate(calls_url)
+        if not await self.wait_for_selector('input[placeholder*="Search"]'):
+            raise TransientDownloadError("calls page did not render")
+        
+        # Search for specific call
+        # Try to find search input
+        await mcp__playwright__browser_type(
+            element="Search input",
+            ref='input[placeholder*="Search"]',
+            text=call_sid
+        )
+        
+        # Wait for results
+        if not await self.wait_for_selector('tbody tr'):
+            raise TransientDownloadError("search results did not render")
+        
+        # Click on the call row to open modal
+        await mcp__playwright__browser_click(
+            element=f"Call row for {call_sid}",
+            ref=f':is(tr:has-text("{call_sid}"), [data-call-id="{call_sid}"], td:has-text("{call_sid}"))'
+        )
+        logger.info(f"✅ Clicked call row for {call_sid}")
+        
+        # Wait for modal to open
+        if not await self.wait_for_selector('audio, [data-audio-url]'):
+            raise TransientDownloadError("call modal did not open")
+        
+        # Scan only the requests made since this page loaded for the audio URL
+        requests = await self.new_network_requests()
+        
+        audio_url = None
+        for req in requests:
+            url = req.get('url', '')
+            if _AUDIO_URL_RE.search(url):
+                audio_url = url
+                logger.info(f"🎵 Found audio URL: {url[:80]}...")
+                break
+        del requests
+        
+        if not audio_url:
+            # Try alternative: look for audio element in page
+            # Execute JavaScript to find audio source
+            logger.info("Searching for audio element in page...")
             
-            if audio_url:
-                # Download the audio file
-                logger.info(f"📥 Downloading audio to: {output_path}")
-                
-                # Create a new tab for download
-                await mcp__playwright__browser_tab_new(url=audio_url)
-                await mcp__playwright__browser_wait_for(time=5)
-                
-                # Check if file was downloaded
-                # Note: This is a limitation - we need to handle browser downloads
-                # For now, we'll close the tab and check manually
-                await mcp__playwright__browser_tab_close()
-                
-                # Alternative: Use network request data if available
-                for req in requests:
-                    if req.get('url') == audio_url and req.get('response'):
-                        # We have the response data
-                        logger.info("✅ Audio download completed via network capture")
-                        return str(output_path)
-                
-                # If we got here, download might have succeeded
-                # Check default downloads folder
-                possible_locations = [
-                    Path.home() / "Downloads" / f"{call_sid}.mp3",
-                    Path.home() / "Downloads" / "recording.mp3",
-                    self.downloads_dir / f"{call_sid}.mp3"
-                ]
-                
-                for location in possible_locations:
-                    if location.exists():
-                        # Move to our downloads folder
-                        import shutil
-                        shutil.move(str(location), str(output_path))
-                        logger.info(f"✅ Found and moved audio from {location}")
-                        return str(output_path)
-                
-                logger.warning("⚠️ Could not verify audio download")
-                return None
-                
-            else:
-                logger.error("❌ No audio URL found")
-                return None
-                
-        except Exception as e:
-            logger.error(f"Error downloading audio for {call_sid}: {e}")
-            return None
+            audio_src = await mcp__playwright__browser_evaluate(
+                function="() => document.querySelector('audio')?.src || null"
+            )
+            if audio_src:
+                audio_url = audio_src
+                logger.info(f"🎵 Found audio URL from element: {audio_url[:80]}...")
+        
+        return audio_url
+    
+    def scan_downloaded_sids(self) -> set:
+        """Call SIDs that already have a complete MP3 in the downloads folder"""
+        return {path.stem for path in self.downloads_dir.glob('*.mp3')}
     
     async def download_batch(self, calls: List[Dict], max_concurrent: int = 3) -> Dict:
         """Download multiple calls with concurrency control"""
@@ -294,6 +452,12 @@ class MCPBrowserDownloader:
             results["failed"] = calls
             return results
         
+        # One directory scan up front instead of a blocking stat per call
+        self.downloaded_sids = await asyncio.to_thread(self.scan_downloaded_sids)
+        
+        # Open the CloudFront connection before the first concurrent downloads race for it
+        await self.warmup_connections()
+        
         # Process calls in batches
         for i in range(0, len(calls), max_concurrent):
             batch = calls[i:i + max_concurrent]
@@ -326,6 +490,7 @@ class MCPBrowserDownloader:
         
         # Close browser
         await mcp__playwright__browser_close()
+        await self.aclose()
         
         return results
     
@@ -341,36 +506,132 @@ class MCPBrowserDownloader:
         result = await self.navigate_to_call_and_download(call_data)
         
         await mcp__playwright__browser_close()
+        await self.aclose()
         
         return result is not None
 
 
 # Fallback implementation for audio download via direct HTTP
-async def download_audio_direct(audio_url: str, output_path: str, auth_token: Optional[str] = None) -> bool:
-    """Direct audio download using HTTP request"""
+async def download_audio_direct(
+    audio_url: str,
+    output_path: str,
+    auth_token: Optional[str] = None,
+    client: Optional[httpx.AsyncClient] = None
+) -> bool:
+    """Direct audio download using HTTP request
     
-    import httpx
+    Pass a shared ``client`` to reuse pooled connections; otherwise a
+    one-off client is created and closed. The body is written to a
+    ``.part`` file and only renamed onto output_path once complete, so an
+    existing output_path is always a whole file. Interrupted transfers
+    resume from the partial file with a Range request, guarded by If-Range
+    so a changed object restarts from scratch instead of being spliced.
+    Only transfers that made progress are resumed here; anything else is
+    returned as a failure for the caller's own retry loop.
+    """
+    
+    owns_client = client is None
+    if owns_client:
+        client = httpx.AsyncClient(timeout=HTTP_TIMEOUT, follow_redirects=True)
     
     try:
         headers = {}
         if auth_token:
             headers['x-access-token'] = auth_token
+        
+        tmp = partial_path(output_path)
+        await aiofiles.os.makedirs(tmp.parent, exist_ok=True)
+        
+        for attempt in range(MAX_ATTEMPTS):
+            # Resume from whatever an earlier attempt (or run) left behind,
+            # but only if we know which version of the object it came from
+            start = await aiofiles.os.path.getsize(tmp) if await aiofiles.os.path.exists(tmp) else 0
+            validator = None
+            if start and await aiofiles.os.path.exists(validator_path(tmp)):
+                async with aiofiles.open(validator_path(tmp)) as f:
+                    validator = (await f.read()).strip()
+            if start and not validator:
+                await _discard_partial(tmp)
+                start = 0
             
-        async with httpx.AsyncClient(timeout=60, follow_redirects=True) as client:
-            response = await client.get(audio_url, headers=headers)
+            written = 0
+            request_headers = dict(headers)
+            if start:
+                request_headers['Range'] = f"bytes={start}-"
+                request_headers['If-Range'] = validator
             
-            if response.status_code == 200:
-                with open(output_path, 'wb') as f:
-                    f.write(response.content)
-                logger.info(f"✅ Downloaded {len(response.content)} bytes")
-                return True
-            else:
-                logger.error(f"Download failed: {response.status_code}")
-                return False
+            try:
+                async with client.stream("GET", audio_url, headers=request_headers) as response:
+                    if response.status_code == 206:
+                        mode = 'ab'
+                        expected = response.headers.get('content-range', '').rpartition('/')[2]
+                    elif response.status_code == 200:
+                        # Fresh download, or the object changed / the server
+                        # ignored the Range header; start over
+                        mode = 'wb'
+                        expected = response.headers.get('content-length')
+                        validator = _resume_validator(response)
+                        if validator:
+                            async with aiofiles.open(validator_path(tmp), 'w') as f:
+                                await f.write(validator)
+                        elif await aiofiles.os.path.exists(validator_path(tmp)):
+                            await aiofiles.os.remove(validator_path(tmp))
+                    elif response.status_code == 416 and start:
+                        # Nothing left to fetch: either the partial is already
+                        # whole, or it doesn't match the object any more
+                        total = response.headers.get('content-range', '').rpartition('/')[2]
+                        if total.isdigit() and int(total) == start:
+                            expected = None
+                        else:
+                            logger.warning("Partial download doesn't match the file; restarting")
+                            await _discard_partial(tmp)
+                            continue
+                        mode = None
+                    else:
+                        logger.error(f"Download failed: {response.status_code}")
+                        return False
+                    
+                    if 'content-encoding' in response.headers:
+                        expected = None
+                    
+                    if mode:
+                        async with aiofiles.open(tmp, mode) as f:
+                            async for chunk in response.aiter_bytes():
+                                await f.write(chunk)
+                                written += len(chunk)
+                            
+            except httpx.TransportError as e:
+                if not written:
+                    logger.error(f"Download failed: {e}")
+                    return False
+                logger.warning(f"Download interrupted on attempt {attempt + 1}, resuming: {e}")
+                continue
+            
+            size = await aiofiles.os.path.getsize(tmp)
+            if expected and expected.isdigit() and int(expected) != size:
+                logger.warning(f"Download incomplete: {size} of {expected} bytes")
+                if size > int(expected):
+                    # Partial doesn't belong to this file; don't resume from it
+                    await _discard_partial(tmp)
+                    return False
+                if not written:
+                    return False
+                continue
+            
+            await aiofiles.os.replace(tmp, output_path)
+            await _discard_partial(tmp)
+            logger.info(f"✅ Downloaded {size} bytes")
+            return True
+        
+        logger.error(f"Download failed after {MAX_ATTEMPTS} attempts")
+        return False
                 
     except Exception as e:
         logger.error(f"Direct download error: {e}")
         return False
+    finally:
+        if owns_client:
+            await client.aclose()
 
 
 # Example usage
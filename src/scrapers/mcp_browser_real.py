@@ -13,13 +13,35 @@ logger = logging.getLogger(__name__)
 
 
 class RealMCPBrowserScraper:
-    """Real implementation using MCP browser tools"""
+    """
+    Real implementation using MCP browser tools
+    
+    Use as ``async with RealMCPBrowserScraper() as scraper:`` so the shared
+    HTTP client is closed when the work is done.
+    """
     
     def __init__(self):
         self.dashboard_url = "https://autoservice.digitalconcierge.io"
         self.is_logged_in = False
         self.downloads_dir = Path("downloads")
         self.downloads_dir.mkdir(exist_ok=True)
+        # Shared client so downloads to the same CloudFront host reuse connections
+        self.http = httpx.AsyncClient(
+            http2=True,
+            timeout=60,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=50)
+        )
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+    
+    async def aclose(self):
+        """Close the shared HTTP client"""
+        await self.http.aclose()
         
     async def login_to_dashboard(self):
         """Login to Digital Concierge dashboard using MCP browser"""
@@ -119,19 +141,20 @@ class RealMCPBrowserScraper:
         try:
             logger.info(f"📥 Downloading audio to: {output_path}")
             
-            # Use httpx to download with cookies from browser session
-            async with httpx.AsyncClient(timeout=60) as client:
-                response = await client.get(audio_url, follow_redirects=True)
-                
-                if response.status_code == 200:
-                    with open(output_path, 'wb') as f:
-                        f.write(response.content)
-                    
-                    logger.info(f"✅ Downloaded {len(response.content)} bytes")
-                    return True
-                else:
+            # Use the shared client so repeated downloads reuse connections
+            async with self.http.stream("GET", audio_url) as response:
+                if response.status_code != 200:
                     logger.error(f"Download failed: {response.status_code}")
                     return False
+                
+                size = 0
+                with open(output_path, 'wb') as f:
+                    async for chunk in response.aiter_bytes():
+                        f.write(chunk)
+                        size += len(chunk)
+            
+            logger.info(f"✅ Downloaded {size} bytes")
+            return True
                     
         except Exception as e:
             logger.error(f"Download error: {e}")
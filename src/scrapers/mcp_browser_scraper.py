@@ -9,25 +9,39 @@ Uses MCP browser tools to:
 
 import asyncio
 import os
+import re
+from collections import defaultdict
+from functools import lru_cache
 from dotenv import load_dotenv
 from supabase import create_client
 from datetime import datetime
 import time
 
-load_dotenv()
 
-# Initialize Supabase client
-supabase = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")
-)
+@lru_cache(maxsize=1)
+def get_supabase():
+    """Create the Supabase client on first use rather than at import"""
+    load_dotenv()
+    return create_client(
+        os.getenv("SUPABASE_URL"),
+        os.getenv("SUPABASE_KEY")
+    )
+
+# Status updates are written in batches of this size
+STATUS_FLUSH_SIZE = 25
+
+# Upper bound for element waits; they normally resolve as soon as the page is ready
+WAIT_TIMEOUT_MS = 5000
 
 
 class MCPBrowserScraper:
     def __init__(self):
+        load_dotenv()
         self.dashboard_url = "https://autoservice.digitalconcierge.io"
         self.username = os.getenv("DASHBOARD_USERNAME")
         self.password = os.getenv("DASHBOARD_PASSWORD")
+        # Screenshots are only taken when MCP_DEBUG is set
+        self.debug = bool(os.getenv("MCP_DEBUG"))
         
     async def login_to_dashboard(self):
         """Login to Digital Concierge dashboard using MCP browser"""
@@ -35,13 +49,14 @@ class MCPBrowserScraper:
         
         # Navigate to login page
         await mcp_browser_navigate(url=self.dashboard_url)
-        await mcp_browser_wait_for(time=2)
+        await mcp_browser_wait_for(selector='input[placeholder="User Name"]', timeout=WAIT_TIMEOUT_MS)
         
         # Take screenshot to see current state
-        await mcp_browser_take_screenshot(filename="login_page.png")
+        if self.debug:
+            await mcp_browser_take_screenshot(filename="login_page.png")
         
         # Fill login form
-        username_input = await mcp_browser_snapshot()
+        username_input = SnapshotIndex(await mcp_browser_snapshot())
         # Find username input field
         username_ref = find_element_ref(username_input, 'input[placeholder="User Name"]')
         if username_ref:
@@ -69,7 +84,7 @@ class MCPBrowserScraper:
             )
         
         # Wait for login to complete
-        await mcp_browser_wait_for(time=3)
+        await mcp_browser_wait_for(selector='input[placeholder="Password"]', state='detached', timeout=WAIT_TIMEOUT_MS)
         print("✅ Login successful")
     
     async def navigate_to_call(self, call_sid: str, dc_call_id: str):
@@ -79,10 +94,10 @@ class MCPBrowserScraper:
         # Navigate to calls page with search parameter
         calls_url = f"{self.dashboard_url}/userPortal/admin/calls"
         await mcp_browser_navigate(url=calls_url)
-        await mcp_browser_wait_for(time=3)
+        await mcp_browser_wait_for(selector='.ag-row', timeout=WAIT_TIMEOUT_MS)
         
-        # Take snapshot to see the page structure
-        snapshot = await mcp_browser_snapshot()
+        # One snapshot serves both the search input and call row lookups
+        snapshot = SnapshotIndex(await mcp_browser_snapshot())
         
         # Look for search/filter input
         search_ref = find_element_ref(snapshot, 'input[placeholder*="Search"]')
@@ -93,7 +108,7 @@ class MCPBrowserScraper:
                 ref=search_ref,
                 text=call_sid
             )
-            await mcp_browser_wait_for(time=2)
+            await mcp_browser_wait_for(selector='.ag-row', timeout=WAIT_TIMEOUT_MS)
         
         # Find and click on the call row
         # Look for a row that contains the call ID
@@ -109,13 +124,14 @@ class MCPBrowserScraper:
             )
             
             # Wait for modal to appear
-            await mcp_browser_wait_for(time=3)
+            await mcp_browser_wait_for(selector='.modal-content, audio, [role=dialog]', timeout=WAIT_TIMEOUT_MS)
             
             # Take screenshot of modal
-            await mcp_browser_take_screenshot(filename=f"call_modal_{call_sid}.png")
+            if self.debug:
+                await mcp_browser_take_screenshot(filename=f"call_modal_{call_sid}.png")
             
             # Get new snapshot with modal content
-            modal_snapshot = await mcp_browser_snapshot()
+            modal_snapshot = SnapshotIndex(await mcp_browser_snapshot())
             
             # Look for audio player or recording elements in modal
             audio_ref = find_element_ref(modal_snapshot, 'audio') or \
@@ -144,7 +160,11 @@ class MCPBrowserScraper:
         return None
     
     async def download_audio_for_call(self, call_data: dict):
-        """Download audio for a specific call using browser automation"""
+        """Download audio for a specific call using browser automation
+        
+        Returns (audio_path, status_row); audio_path is None on failure and
+        status_row is the calls-table update for the caller to flush.
+        """
         call_sid = call_data['call_id']
         dc_call_id = call_data['dc_call_id']
         
@@ -161,29 +181,37 @@ class MCPBrowserScraper:
                 # Note: This would need actual implementation with MCP browser download
                 print(f"   📥 Downloading audio to: {output_path}")
                 
-                # Update call status
-                supabase.table('calls').update({
+                return output_path, {
+                    'call_id': call_sid,
                     'status': 'downloaded',
                     'download_status': 'completed'
-                }).eq('call_id', call_sid).execute()
-                
-                return output_path
+                }
             else:
                 # Mark as failed
-                supabase.table('calls').update({
+                return None, {
+                    'call_id': call_sid,
                     'status': 'download_failed',
                     'download_status': 'failed'
-                }).eq('call_id', call_sid).execute()
-                
-                return None
+                }
                 
         except Exception as e:
             print(f"   ❌ Error: {e}")
-            supabase.table('calls').update({
+            return None, {
+                'call_id': call_sid,
                 'status': 'error',
                 'download_status': 'error'
-            }).eq('call_id', call_sid).execute()
-            return None
+            }
+    
+    async def flush_status_updates(self, updates: list):
+        """Write accumulated call status updates in a single upsert"""
+        if not updates:
+            return
+        
+        await asyncio.to_thread(
+            get_supabase().table('calls').upsert(updates, on_conflict='call_id').execute
+        )
+        print(f"💾 Saved status for {len(updates)} calls")
+        updates.clear()
     
     async def process_pending_calls(self, batch_size: int = 3):
         """Process pending calls using MCP browser"""
@@ -191,32 +219,140 @@ class MCPBrowserScraper:
         await self.login_to_dashboard()
         
         # Get pending calls
-        result = supabase.table('calls').select("*").eq('status', 'pending_download').limit(batch_size).execute()
+        result = get_supabase().table('calls').select('call_id,dc_call_id,customer_name').eq('status', 'pending_download').limit(batch_size).execute()
         pending_calls = result.data
         
         print(f"\n📋 Found {len(pending_calls)} pending calls to process")
         
-        for call in pending_calls:
-            print(f"\n{'='*60}")
-            print(f"Processing: {call['call_id']} - {call['customer_name']}")
-            
-            audio_path = await self.download_audio_for_call(call)
-            
-            if audio_path:
-                print(f"✅ Successfully downloaded audio for {call['call_id']}")
-            else:
-                print(f"❌ Failed to download audio for {call['call_id']}")
+        status_updates = []
+        try:
+            for call in pending_calls:
+                print(f"\n{'='*60}")
+                print(f"Processing: {call['call_id']} - {call['customer_name']}")
+                
+                audio_path, status_row = await self.download_audio_for_call(call)
+                status_updates.append(status_row)
+                
+                if audio_path:
+                    print(f"✅ Successfully downloaded audio for {call['call_id']}")
+                else:
+                    print(f"❌ Failed to download audio for {call['call_id']}")
+                
+                if len(status_updates) >= STATUS_FLUSH_SIZE:
+                    await self.flush_status_updates(status_updates)
+        finally:
+            await self.flush_status_updates(status_updates)
+
+
+_SELECTOR_RE = re.compile(
+    r'^(?P<tag>[a-zA-Z][\w-]*)?'
+    r'(?P<classes>(?:\.[\w-]+)*)'
+    r'(?P<attrs>(?:\[[\w-]+(?:[*^$]?=)?(?:"[^"]*")?\])*)'
+    r'(?::(?:has-text|contains)\("(?P<text>[^"]*)"\))?$'
+)
+_ATTR_RE = re.compile(r'\[([\w-]+)(?:([*^$]?=)"([^"]*)")?\]')
+
+
+@lru_cache(maxsize=256)
+def parse_selector(selector):
+    """Parse a simple CSS selector into (tag, classes, attrs, text)
+    
+    Supports tag, .class, [attr], [attr="v"], [attr*="v"], [attr^="v"],
+    [attr$="v"] and a trailing :has-text("...") / :contains("...").
+    """
+    match = _SELECTOR_RE.match(selector.strip())
+    if not match:
+        return None
+    
+    attrs = tuple(_ATTR_RE.findall(match.group('attrs')))
+    classes = tuple(c for c in match.group('classes').split('.') if c)
+    return match.group('tag'), classes, attrs, match.group('text')
+
+
+class SnapshotIndex:
+    """Selector lookups against one accessibility snapshot
+    
+    The tree is walked once on construction and indexed by tag, class and
+    attribute name, so each by_css() call only checks likely candidates.
+    """
+    
+    def __init__(self, snapshot):
+        self.nodes = {}
+        self.by_tag = defaultdict(list)
+        self.by_class = defaultdict(list)
+        self.by_attr = defaultdict(list)
+        
+        stack = [snapshot] if snapshot else []
+        while stack:
+            node = stack.pop()
+            if not isinstance(node, dict):
+                continue
+            stack.extend(reversed(node.get('children', [])))
             
-            # Small delay between calls
-            await mcp_browser_wait_for(time=2)
+            ref = node.get('ref')
+            if not ref:
+                continue
+            self.nodes[ref] = node
+            self.by_tag[node.get('tag', '').lower()].append(ref)
+            attributes = node.get('attributes', {})
+            for cls in attributes.get('class', '').split():
+                self.by_class[cls].append(ref)
+            for name in attributes:
+                self.by_attr[name].append(ref)
+    
+    def by_css(self, selector):
+        """Return the ref of the first element matching selector, or None"""
+        parsed = parse_selector(selector)
+        if not parsed:
+            return None
+        tag, classes, attrs, text = parsed
+        
+        # Start from the narrowest index that applies
+        if classes:
+            candidates = self.by_class.get(classes[0], [])
+        elif attrs:
+            candidates = self.by_attr.get(attrs[0][0], [])
+        elif tag:
+            candidates = self.by_tag.get(tag.lower(), [])
+        else:
+            candidates = self.nodes
+        
+        for ref in candidates:
+            if self._matches(self.nodes[ref], tag, classes, attrs, text):
+                return ref
+        return None
+    
+    @staticmethod
+    def _matches(node, tag, classes, attrs, text):
+        attributes = node.get('attributes', {})
+        if tag and node.get('tag', '').lower() != tag.lower():
+            return False
+        if classes and not set(classes) <= set(attributes.get('class', '').split()):
+            return False
+        for name, op, value in attrs:
+            actual = attributes.get(name)
+            if actual is None:
+                return False
+            if op == '=' and actual != value:
+                return False
+            if op == '*=' and value not in actual:
+                return False
+            if op == '^=' and not actual.startswith(value):
+                return False
+            if op == '$=' and not actual.endswith(value):
+                return False
+        if text is not None and text not in node.get('text', ''):
+            return False
+        return True
 
 
 # Helper function to find element reference in snapshot
-def find_element_ref(snapshot, selector):
-    """Mock function to find element reference - would need actual implementation"""
-    # This would parse the snapshot and find matching elements
-    # For now, returning a mock reference
-    return f"element_{selector}"
+def find_element_ref(index, selector):
+    """Look up selector in a SnapshotIndex"""
+    if not index.nodes:
+        # The mock snapshot is empty; hand back a placeholder ref
+        return f"element_{selector}"
+    return index.by_css(selector)
 
 
 # Mock MCP browser functions - these would be actual MCP tool calls
@@ -224,7 +360,11 @@ async def mcp_browser_navigate(url):
     print(f"🌐 Navigating to: {url}")
     # Would use actual mcp__playwright__browser_navigate
 
-async def mcp_browser_wait_for(time):
+async def mcp_browser_wait_for(time=None, selector=None, state='visible', timeout=WAIT_TIMEOUT_MS):
+    if selector:
+        # Resolves as soon as the selector reaches state, up to timeout ms
+        print(f"⏳ Waiting for {selector} ({state})")
+        return
     await asyncio.sleep(time)
     # Would use actual mcp__playwright__browser_wait_for
 
@@ -1,24 +1,29 @@
 import asyncio
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 import os
 from dotenv import load_dotenv
 from supabase import create_client
 from datetime import datetime
+from functools import lru_cache
 import json
+import re
 
-load_dotenv()
-
-# Initialize Supabase
-supabase = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")
-)
+@lru_cache(maxsize=1)
+def get_supabase():
+    """Create the Supabase client on first use rather than at import"""
+    load_dotenv()
+    return create_client(
+        os.getenv("SUPABASE_URL"),
+        os.getenv("SUPABASE_KEY")
+    )
 
 async def scrape_calls_with_aggrid():
     """Scrape calls from AG-Grid table"""
+    load_dotenv()
     
     async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)
+        # Headless unless DEBUG_BROWSER is set
+        browser = await p.chromium.launch(headless=not os.getenv('DEBUG_BROWSER'))
         context = await browser.new_context()
         page = await context.new_page()
         
@@ -28,12 +33,12 @@ async def scrape_calls_with_aggrid():
         # Login
         print("Logging in...")
         await page.goto(os.getenv("DASHBOARD_URL"))
-        await page.wait_for_timeout(2000)
+        await page.wait_for_selector('input[placeholder="User Name"]')
         
         await page.fill('input[placeholder="User Name"]', os.getenv("DASHBOARD_USERNAME"))
         await page.fill('input[placeholder="Password"]', os.getenv("DASHBOARD_PASSWORD"))
         await page.click('button:has-text("Sign in")')
-        await page.wait_for_timeout(3000)
+        await page.wait_for_selector('input[placeholder="Password"]', state='detached')
         
         # Go to calls page
         print("Going to calls page...")
@@ -42,48 +47,46 @@ async def scrape_calls_with_aggrid():
         # Wait for AG-Grid to load
         print("Waiting for AG-Grid to load...")
         await page.wait_for_selector('.ag-root-wrapper', timeout=10000)
-        await page.wait_for_timeout(3000)  # Give it time to populate
+        await page.wait_for_function(
+            "document.querySelectorAll('.ag-center-cols-container .ag-row').length > 0",
+            timeout=10000
+        )
         
         # Get calls data from AG-Grid
         print("Extracting call data from AG-Grid...")
-        calls_data = await page.evaluate('''
-            () => {
-                // Find all row elements in AG-Grid
-                const rows = document.querySelectorAll('.ag-center-cols-container .ag-row');
-                console.log(`Found ${rows.length} rows`);
-                
-                const calls = [];
-                
-                rows.forEach((row, index) => {
-                    // Get all cells in the row
-                    const cells = row.querySelectorAll('.ag-cell');
-                    const cellData = Array.from(cells).map(cell => cell.textContent?.trim() || '');
-                    
-                    if (cellData.length > 0 && cellData.some(c => c)) {
-                        // Extract data based on column position
-                        const call = {
-                            rowIndex: index,
-                            date: cellData[0] || '',
-                            direction: cellData[1] || '',
-                            name: cellData[2] || '',
-                            from: cellData[3] || '',
-                            to: cellData[4] || '',
-                            length: cellData[5] || '',
-                            tags: cellData[6] || '',
-                            advisor: cellData[7] || '',
-                            reviewScore: cellData[8] || '',
-                            hasRecording: cellData.some(cell => cell.includes('🎙')),
-                            rawData: cellData
-                        };
-                        
-                        calls.push(call);
-                    }
-                });
-                
-                return calls;
-            }
+        # Rows come back as one delimited string ('\x1e' between rows, '\x1f'
+        # between cells) and are split here, so the page doesn't build an
+        # object per row; each row is split on its own in case cell counts differ
+        blob = await page.evaluate('''
+            () => Array.from(
+                document.querySelectorAll('.ag-center-cols-container .ag-row'),
+                row => Array.from(row.querySelectorAll('.ag-cell'), c => c.textContent?.trim() || '').join('\\x1f')
+            ).join('\\x1e')
         ''')
         
+        calls_data = []
+        for index, row in enumerate(blob.split('\x1e') if blob else []):
+            cell_data = row.split('\x1f')
+            if not any(cell_data):
+                continue
+            
+            # Extract data based on column position
+            fields = cell_data + [''] * (9 - len(cell_data))
+            calls_data.append({
+                'rowIndex': index,
+                'date': fields[0],
+                'direction': fields[1],
+                'name': fields[2],
+                'from': fields[3],
+                'to': fields[4],
+                'length': fields[5],
+                'tags': fields[6],
+                'advisor': fields[7],
+                'reviewScore': fields[8],
+                'hasRecording': any('🎙' in cell for cell in cell_data),
+                'rawData': cell_data
+            })
+        
         print(f"Found {len(calls_data)} calls")
         
         if len(calls_data) == 0:
@@ -122,10 +125,12 @@ async def scrape_calls_with_aggrid():
             # Click on the row to see if we can get more details
             try:
                 await page.click(f'.ag-center-cols-container .ag-row:nth-child({i+1})')
-                await page.wait_for_timeout(2000)
                 
                 # Check for any modal or expanded view
-                modal = await page.query_selector('.modal-content, [role="dialog"], .call-details')
+                try:
+                    modal = await page.wait_for_selector('.modal-content, [role="dialog"], .call-details', timeout=5000)
+                except PlaywrightTimeoutError:
+                    modal = None
                 if modal:
                     print("Found modal/details view")
                     
@@ -140,7 +145,7 @@ async def scrape_calls_with_aggrid():
                     close_btn = await page.query_selector('button[aria-label="Close"], button:has-text("Close"), .close')
                     if close_btn:
                         await close_btn.click()
-                        await page.wait_for_timeout(500)
+                        await modal.wait_for_element_state('hidden', timeout=5000)
             except Exception as e:
                 print(f"Error clicking row: {e}")
             
@@ -168,31 +173,30 @@ async def scrape_calls_with_aggrid():
                     'status': 'scraped'
                 }
                 
-                result = supabase.table('calls').insert(call_record).execute()
+                result = get_supabase().table('calls').insert(call_record).execute()
                 print(f"✅ Inserted call {call_id}")
                 
             except Exception as e:
                 print(f"❌ Error inserting call: {e}")
         
-        print("\n\nPress Enter to close browser...")
-        input()
+        if os.getenv('KEEP_BROWSER_OPEN'):
+            input("\n\nPress Enter to close browser...")
         
         await browser.close()
 
+# "m:ss" or "h:mm:ss", or a bare number of seconds
+_DURATION_RE = re.compile(r"^(?:(\d+):)?(\d+):(\d+)$|^(\d+)$")
+
+@lru_cache(maxsize=4096)
 def parse_duration(duration_str):
     """Convert duration string to seconds"""
-    if not duration_str:
-        return 0
-    try:
-        parts = duration_str.split(':')
-        if len(parts) == 2:
-            return int(parts[0]) * 60 + int(parts[1])
-        elif len(parts) == 3:
-            return int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
-        else:
-            return int(duration_str)
-    except:
+    match = _DURATION_RE.match(duration_str) if isinstance(duration_str, str) else None
+    if not match:
         return 0
+    hours, minutes, seconds, total = match.groups()
+    if total:
+        return int(total)
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)
 
 if __name__ == "__main__":
     asyncio.run(scrape_calls_with_aggrid())
\ No newline at end of file
@@ -13,43 +13,183 @@ Process:
 
 import httpx
 import asyncio
+import aiofiles
 import os
+import re
+import base64
+import fcntl
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+import time
+from pathlib import Path
 from dotenv import load_dotenv
+from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
-import json
+from functools import lru_cache
+import orjson
 from typing import List, Dict, Optional
 from urllib.parse import urlparse
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Audio is streamed to disk in chunks of this size
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# JWTs are cached here between runs; a cached token is reused until it is
+# within TOKEN_EXPIRY_MARGIN seconds of expiring
+TOKEN_CACHE_PATH = Path(os.getenv("DC_TOKEN_CACHE", "~/.cache/dc_token.json")).expanduser()
+TOKEN_EXPIRY_MARGIN = 60
+
+# Calls without a recording are dropped before any CallInfo is built unless
+# KEEP_METADATA_ONLY is set
+KEEP_METADATA_ONLY = bool(os.getenv("KEEP_METADATA_ONLY"))
+
+# CloudFront location of a recording, by recording ID
+_CLOUDFRONT_RECORDING_URL = "https://d3vneafawyd5u6.cloudfront.net/Recordings/{}.mp3"
+
+# The /call/list fields read by extract_call_infos and extract_audio_url
+CALL_LIST_FIELDS = [
+    "CallSid", "_id", "name", "From", "To", "Direction", "convertedDuration",
+    "date_created", "tenantId", "status", "recordingId", "recordingUrl",
+    "ext", "entryPoint", "siteInfo"
+]
+
+
+def _jwt_expiry(token: str) -> Optional[int]:
+    """Read the exp claim from a JWT without verifying it"""
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return int(orjson.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _load_cached_token(username: str, base_url: str) -> Optional[str]:
+    """Return the cached token if it belongs to this account and is still comfortably valid"""
+    try:
+        cached = orjson.loads(TOKEN_CACHE_PATH.read_bytes())
+    except (OSError, ValueError):
+        return None
+    
+    if cached.get('username') != username or cached.get('base_url') != base_url:
+        return None
+    if cached.get('exp', 0) > time.time() + TOKEN_EXPIRY_MARGIN:
+        return cached.get('token')
+    return None
+
+
+def _save_cached_token(token: str, username: str, base_url: str):
+    """Atomically write the token, its owner and its expiry to the cache file"""
+    exp = _jwt_expiry(token)
+    if exp is None:
+        return
+    
+    TOKEN_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = TOKEN_CACHE_PATH.with_suffix('.tmp')
+    # The token is a bearer credential, so keep the file private to this user
+    # (a leftover tmp file would keep its old mode, so start from a fresh one)
+    tmp.unlink(missing_ok=True)
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(orjson.dumps({'token': token, 'exp': exp, 'username': username, 'base_url': base_url}))
+    os.replace(tmp, TOKEN_CACHE_PATH)
+
+
+@dataclass(slots=True)
+class CallInfo:
+    """A call from /call/list, flattened to the fields we store"""
+    call_id: Optional[str]
+    dc_call_id: Optional[str]
+    customer_name: str
+    customer_number: str
+    to_number: str
+    call_direction: str
+    duration_seconds: int
+    date_created: str
+    tenant_id: str
+    status: str
+    has_recording: bool
+    extension: str
+    entry_point: str
+    site_info: Dict
+    audio_file: Optional[str] = None
+    audio_url: Optional[str] = None
+    
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+# [[H:]M:]S, e.g. '45', '1:23', '1:02:03'
+_DURATION_RE = re.compile(r'^(?:(?:(\d+):)?(\d+):)?(\d+)$')
+
+
+@lru_cache(maxsize=4096)
+def _parse_duration_cached(duration) -> int:
+    """Parse a duration string like '1:23'; the set of distinct values is small"""
+    match = _DURATION_RE.match(duration or '0') if isinstance(duration, str) else None
+    if not match:
+        return 0
+    hours, minutes, seconds = match.groups()
+    return int(hours or 0) * 3600 + int(minutes or 0) * 60 + int(seconds)
+
+
 class DCAPIScraper:
     def __init__(self):
         self.base_url = "https://autoservice.api.digitalconcierge.io"
         self.username = os.getenv("DASHBOARD_USERNAME")
         self.password = os.getenv("DASHBOARD_PASSWORD")
         self.token = None
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.list_projection_supported = True
+        self.client = httpx.AsyncClient(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=32, keepalive_expiry=60)
+        )
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+    
+    async def aclose(self):
+        """Close the HTTP client"""
+        await self.client.aclose()
     
     def _parse_duration(self, duration) -> int:
         """Parse duration - can be int (seconds) or string like '1:23'"""
         if isinstance(duration, int):
             return duration
+        return _parse_duration_cached(duration)
         
-        if not duration or duration == '0:00':
-            return 0
+    async def authenticate(self, force: bool = False) -> str:
+        """Get a JWT token, reusing the on-disk cache unless force is set"""
+        if not force:
+            cached = _load_cached_token(self.username, self.base_url)
+            if cached:
+                self.token = cached
+                print("🔑 Using cached DC API token")
+                return self.token
         
-        if isinstance(duration, str):
-            parts = duration.split(':')
-            if len(parts) == 2:
-                minutes, seconds = parts
-                return int(minutes) * 60 + int(seconds)
-            elif len(parts) == 3:
-                hours, minutes, seconds = parts
-                return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
-        
-        return 0
-        
-    async def authenticate(self) -> str:
+        # Serialize refreshes across workers so they don't all hit the auth endpoint
+        TOKEN_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(TOKEN_CACHE_PATH.with_suffix('.lock'), 'w') as lock:
+            await asyncio.to_thread(fcntl.flock, lock, fcntl.LOCK_EX)
+            
+            # Another worker may have refreshed while we waited
+            cached = _load_cached_token(self.username, self.base_url)
+            if cached and cached != self.token:
+                self.token = cached
+                print("🔑 Using cached DC API token")
+                return self.token
+            
+            return await self._request_token()
+    
+    async def _request_token(self) -> str:
         """Authenticate and get JWT token"""
         print("🔐 Authenticating with DC API...")
         
@@ -64,7 +204,7 @@ class DCAPIScraper:
         )
         
         if response.status_code == 200:
-            result = response.json()
+            result = orjson.loads(response.content)
             print(f"🔍 Auth response keys: {list(result.keys())}")
             
             # Try different possible token field names
@@ -75,15 +215,33 @@ class DCAPIScraper:
                 self.token = result
             
             print(f"✅ Authentication successful! Token: {self.token[:20]}..." if self.token else "❌ No token found")
+            if self.token:
+                _save_cached_token(self.token, self.username, self.base_url)
             return self.token
         else:
             raise Exception(f"Authentication failed: {response.status_code} - {response.text}")
     
-    async def get_calls(self, limit: int = 100, days_back: int = 30) -> List[Dict]:
-        """Fetch calls from the API"""
+    async def _authorized_request(self, method: str, url: str, headers: Optional[Dict] = None, **kwargs) -> httpx.Response:
+        """Send an authenticated request, refreshing the token once on 401"""
         if not self.token:
             await self.authenticate()
         
+        response = await self.client.request(method, url, headers={**(headers or {}), "x-access-token": self.token}, **kwargs)
+        if response.status_code == 401:
+            print("🔄 Token rejected, re-authenticating...")
+            await self.authenticate(force=True)
+            response = await self.client.request(method, url, headers={**(headers or {}), "x-access-token": self.token}, **kwargs)
+        return response
+    
+    async def get_calls(self, limit: int = 100, days_back: int = 30,
+                        fields: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Fetch calls from the API
+        
+        Pass fields to ask the API for only those keys; by default full call
+        documents are returned, since other callers read fields such as
+        RecordingSid that process_calls doesn't need.
+        """
         print(f"📞 Fetching calls from the last {days_back} days...")
         
         # Calculate date range
@@ -105,21 +263,38 @@ class DCAPIScraper:
         }
         
         headers = {
-            "x-access-token": self.token,
             "Content-Type": "application/json",
-            "Accept": "application/json"
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate"
         }
         
         print(f"🔍 Using x-access-token header")
         
-        response = await self.client.post(
+        # Ask for only the requested fields; fall back to full documents if
+        # the API rejects the projection
+        if fields and self.list_projection_supported:
+            payload["fields"] = fields
+        
+        response = await self._authorized_request(
+            "POST",
             f"{self.base_url}/call/list",
             json=payload,
             headers=headers
         )
         
+        if response.status_code in (400, 422) and "fields" in payload:
+            print("⚠️  Field projection not supported, requesting full documents")
+            self.list_projection_supported = False
+            del payload["fields"]
+            response = await self._authorized_request(
+                "POST",
+                f"{self.base_url}/call/list",
+                json=payload,
+                headers=headers
+            )
+        
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             print(f"🔍 Response keys: {list(data.keys())}")
             
             # Try different possible field names for the calls array
@@ -136,135 +311,190 @@ class DCAPIScraper:
     
     async def get_call_details(self, call_sid: str) -> Optional[Dict]:
         """Get detailed information about a specific call"""
-        if not self.token:
-            await self.authenticate()
-        
-        headers = {
-            "x-access-token": self.token
-        }
-        
-        response = await self.client.get(
-            f"{self.base_url}/call/{call_sid}",
-            headers=headers
+        response = await self._authorized_request(
+            "GET",
+            f"{self.base_url}/call/{call_sid}"
         )
         
         if response.status_code == 200:
-            return response.json()
+            return orjson.loads(response.content)
         else:
             print(f"⚠️  Could not get details for call {call_sid}")
             return None
     
-    def extract_audio_url(self, call_data: Dict) -> Optional[str]:
-        """Extract audio URL from call data"""
-        # Check various possible fields for audio URL
-        recording_url = call_data.get("recordingUrl")
-        if recording_url:
-            return recording_url
+    async def get_call_by_id(self, dc_call_id: str) -> Optional[Dict]:
+        """Look up a single call by its dashboard _id via /call/list"""
+        response = await self._authorized_request(
+            "POST",
+            f"{self.base_url}/call/list",
+            json={"query": {"_id": dc_call_id}, "page": 1, "limit": 1}
+        )
         
-        # Check if there's a recording ID to construct URL
-        recording_id = call_data.get("recordingId") or call_data.get("CallSid")
-        if recording_id:
-            # Construct CloudFront URL based on pattern
-            return f"https://d3vneafawyd5u6.cloudfront.net/Recordings/{recording_id}.mp3"
+        if response.status_code != 200:
+            print(f"⚠️  Could not look up call {dc_call_id}: {response.status_code}")
+            return None
         
-        return None
+        data = orjson.loads(response.content)
+        calls = data if isinstance(data, list) else data.get("docs") or data.get("calls") or data.get("data") or []
+        
+        # If the API ignored the _id filter, calls[0] is just the newest call
+        call = next((c for c in calls if c.get("_id") == dc_call_id), None)
+        if calls and call is None:
+            print(f"⚠️  /call/list did not return call {dc_call_id}")
+        return call
+    
+    def extract_audio_url(self, call_data: Dict, require_recording: bool = False) -> Optional[str]:
+        """
+        Extract audio URL from call data
+        
+        By default the CloudFront URL is guessed from the CallSid when the call
+        has no recording fields. With require_recording, only recordingUrl,
+        recordingId or RecordingSid count, so a call without a recording
+        returns None.
+        """
+        # Prefer a full recording URL, else build the CloudFront URL from an ID
+        if require_recording:
+            rid = call_data.get("recordingUrl") or call_data.get("recordingId") or call_data.get("RecordingSid")
+        else:
+            rid = call_data.get("recordingUrl") or call_data.get("recordingId") or call_data.get("CallSid")
+        if not rid:
+            return None
+        return rid if rid.startswith("http") else _CLOUDFRONT_RECORDING_URL.format(rid)
     
     async def download_audio(self, url: str, output_path: str) -> bool:
-        """Download audio file from URL"""
+        """Download audio file from URL, streaming it to disk in chunks"""
         try:
-            print(f"📥 Downloading audio from: {url}")
-            response = await self.client.get(url, follow_redirects=True)
-            
-            if response.status_code == 200:
+            async with self.client.stream('GET', url, follow_redirects=True) as response:
+                if response.status_code != 200:
+                    logger.warning("audio download failed url=%s status=%d", url, response.status_code)
+                    return False
+                
                 os.makedirs(os.path.dirname(output_path), exist_ok=True)
-                with open(output_path, 'wb') as f:
-                    f.write(response.content)
-                print(f"✅ Audio saved to: {output_path}")
-                return True
-            else:
-                print(f"⚠️  Failed to download audio: {response.status_code}")
-                return False
+                async with aiofiles.open(output_path, 'wb') as f:
+                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        await f.write(chunk)
+                        
+            return True
         except Exception as e:
-            print(f"⚠️  Error downloading audio: {e}")
+            logger.warning("audio download error url=%s error=%s", url, e)
             return False
     
-    async def process_calls(self, limit: int = 10):
+    def extract_call_infos(self, calls: List[Dict]) -> List[CallInfo]:
+        """Build CallInfo rows for a whole page of API calls in one pass"""
+        parse_duration = self._parse_duration
+        
+        # Extract call data - using actual field names from API
+        return [
+            CallInfo(
+                call_id=get('CallSid'),
+                dc_call_id=get('_id'),
+                customer_name=get('name', ''),
+                customer_number=get('From', ''),
+                to_number=get('To', ''),
+                call_direction=get('Direction', 'inbound'),
+                duration_seconds=parse_duration(get('convertedDuration', '0:00')),
+                date_created=get('date_created', ''),
+                tenant_id=get('tenantId', ''),
+                status=get('status', ''),
+                has_recording=bool(get('recordingId') or get('recordingUrl')),
+                extension=get('ext', ''),
+                entry_point=get('entryPoint', ''),
+                site_info=get('siteInfo', {})
+            )
+            for get in (call.get for call in calls)
+        ]
+    
+    async def _process_call(self, call: Dict, call_info: CallInfo, sem: asyncio.Semaphore) -> CallInfo:
+        """Download a call's audio if it has any, bounded by sem"""
+        if call_info.has_recording:
+            async with sem:
+                audio_url = self.extract_audio_url(call)
+                if audio_url:
+                    filename = f"downloads/{call_info.call_id}.mp3"
+                    success = await self.download_audio(audio_url, filename)
+                    if success:
+                        call_info.audio_file = filename
+                        call_info.audio_url = audio_url
+        
+        logger.info(
+            "call %s name=%s from=%s dur=%ds date=%s rec=%s audio=%s",
+            call_info.call_id, call_info.customer_name, call_info.customer_number,
+            call_info.duration_seconds, call_info.date_created,
+            call_info.has_recording, call_info.audio_file
+        )
+        return call_info
+    
+    async def process_calls(self, limit: int = 10, max_concurrent: int = 8) -> List[CallInfo]:
         """Main process to fetch and process calls"""
         try:
             # Get calls from API
-            calls = await self.get_calls(limit=limit)
+            calls = await self.get_calls(limit=limit, fields=CALL_LIST_FIELDS)
             
-            processed_calls = []
+            if calls:
+                logger.debug("first call keys: %s", list(calls[0].keys()))
             
-            for idx, call in enumerate(calls):
-                if idx == 0:
-                    print(f"\n🔍 First call keys: {list(call.keys())}")
-                
-                print(f"\n{'='*60}")
-                print(f"Processing call: {call.get('call_sid') or call.get('CallSid', 'Unknown')}")
-                
-                # Extract call data - using actual field names from API
-                call_info = {
-                    'call_id': call.get('CallSid'),
-                    'dc_call_id': call.get('_id'),
-                    'customer_name': call.get('name', ''),
-                    'customer_number': call.get('From', ''),
-                    'to_number': call.get('To', ''),
-                    'call_direction': call.get('Direction', 'inbound'),
-                    'duration_seconds': self._parse_duration(call.get('convertedDuration', '0:00')),
-                    'date_created': call.get('date_created', ''),
-                    'tenant_id': call.get('tenantId', ''),
-                    'status': call.get('status', ''),
-                    'has_recording': bool(call.get('recordingId') or call.get('recordingUrl')),
-                    'extension': call.get('ext', ''),
-                    'entry_point': call.get('entryPoint', ''),
-                    'site_info': call.get('siteInfo', {})
-                }
-                
-                print(f"📋 Call Info:")
-                print(f"   Customer: {call_info['customer_name']} ({call_info['customer_number']})")
-                print(f"   Duration: {call_info['duration_seconds']}s")
-                print(f"   Date: {call_info['date_created']}")
-                print(f"   Has Recording: {call_info['has_recording']}")
-                
-                # Download audio if available
-                if call_info['has_recording']:
-                    audio_url = self.extract_audio_url(call)
-                    if audio_url:
-                        filename = f"downloads/{call_info['call_id']}.mp3"
-                        success = await self.download_audio(audio_url, filename)
-                        if success:
-                            call_info['audio_file'] = filename
-                            call_info['audio_url'] = audio_url
-                
-                processed_calls.append(call_info)
+            if not KEEP_METADATA_ONLY:
+                total = len(calls)
+                calls = [call for call in calls if call.get('recordingId') or call.get('recordingUrl')]
+                print(f"⏭️  Skipping {total - len(calls)} calls without recordings")
+            
+            call_infos = self.extract_call_infos(calls)
+            print(f"📋 Extracted {len(call_infos)} calls, "
+                  f"{sum(1 for c in call_infos if c.has_recording)} with recordings")
+            
+            # Calls are independent, so download up to max_concurrent at once
+            sem = asyncio.Semaphore(max_concurrent)
+            results = await asyncio.gather(
+                *(self._process_call(call, call_info, sem) for call, call_info in zip(calls, call_infos)),
+                return_exceptions=True
+            )
+            
+            processed_calls = []
+            for call_info, result in zip(call_infos, results):
+                if isinstance(result, Exception):
+                    logger.warning("call %s failed: %s", call_info.call_id or 'Unknown', result)
+                    continue
+                processed_calls.append(result)
             
             return processed_calls
             
         except Exception as e:
             print(f"❌ Error processing calls: {e}")
             raise
-        finally:
-            await self.client.aclose()
+
+
+def configure_logging():
+    """Send log records through a queue so writes happen off the event loop thread"""
+    log_queue = queue.Queue()
+    listener = QueueListener(log_queue, logging.StreamHandler())
+    
+    root = logging.getLogger()
+    root.setLevel(os.getenv("LOGLEVEL", "INFO").upper())
+    root.addHandler(QueueHandler(log_queue))
+    listener.start()
+    return listener
 
 
 async def main():
     """Run the API scraper"""
-    scraper = DCAPIScraper()
-    
-    # Process recent calls
-    calls = await scraper.process_calls(limit=5)
+    async with DCAPIScraper() as scraper:
+        # Process recent calls
+        calls = await scraper.process_calls(limit=5)
     
     print(f"\n\n📊 SUMMARY")
     print(f"{'='*60}")
     print(f"Total calls processed: {len(calls)}")
-    print(f"Calls with recordings: {sum(1 for c in calls if c.get('has_recording'))}")
+    print(f"Calls with recordings: {sum(1 for c in calls if c.has_recording)}")
     
     # Save results to JSON for reference
-    with open('api_scraped_calls.json', 'w') as f:
-        json.dump(calls, f, indent=2)
+    with open('api_scraped_calls.json', 'wb') as f:
+        f.write(orjson.dumps(calls, option=orjson.OPT_INDENT_2))
     print(f"\n💾 Results saved to api_scraped_calls.json")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    listener = configure_logging()
+    try:
+        asyncio.run(main())
+    finally:
+        listener.stop()
\ No newline at end of file
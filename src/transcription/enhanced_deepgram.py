@@ -4,15 +4,159 @@ Leverages advanced Deepgram features for automotive service calls
 """
 
 import asyncio
+import bisect
+import functools
+import hashlib
+import itertools
 import json
 import logging
+import os
+import pickle
+import re
+import shutil
+import subprocess
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Dict, List, Optional, Tuple
-from datetime import datetime
+import ahocorasick
+import aiofiles
 from deepgram import DeepgramClient, PrerecordedOptions
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Deepgram responses are cached here, keyed by audio content and options
+DG_CACHE_DIR = Path(os.getenv("DG_CACHE", "~/.mcp_call_analyzer/cache")).expanduser()
+
+
+def cached_by_content(transcribe):
+    """
+    Cache a Deepgram transcribe call on disk
+    
+    The wrapped function takes a {"buffer": bytes} source and an options
+    object; a response is reused whenever the same audio is sent with the
+    same options.
+    """
+    @functools.wraps(transcribe)
+    def wrapper(source, options):
+        option_values = options if isinstance(options, dict) else vars(options)
+        options_digest = hashlib.sha1(
+            json.dumps(option_values, sort_keys=True, default=str).encode()
+        ).hexdigest()[:8]
+        key = f"{hashlib.sha256(source['buffer']).hexdigest()}_{options_digest}"
+        cache_path = DG_CACHE_DIR / f"{key}.pkl"
+        
+        if cache_path.exists():
+            try:
+                response = pickle.loads(cache_path.read_bytes())
+                logger.info(f"Using cached transcription {key}")
+                return response
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable transcription cache {cache_path}: {e}")
+        
+        response = transcribe(source, options)
+        
+        try:
+            DG_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix('.tmp')
+            tmp_path.write_bytes(pickle.dumps(response))
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            logger.warning(f"Could not cache transcription {key}: {e}")
+        
+        return response
+    
+    return wrapper
+
+
+# Custom vocabulary for automotive terms
+CUSTOM_VOCABULARY = (
+    "oil change", "brake pads", "transmission", "coolant",
+    "alternator", "serpentine belt", "CV joint", "struts",
+    "alignment", "tire rotation", "diagnostic", "OBD",
+    "check engine light", "synthetic oil", "conventional oil"
+)
+
+# Script compliance keywords to monitor
+SCRIPT_KEYWORDS = {
+    "greeting": ("thank you for calling", "how can I help"),
+    "appointment_confirm": ("scheduled for", "confirm your appointment"),
+    "upsell": ("recommend", "also suggest", "while you're here"),
+    "closing": ("anything else", "thank you for choosing")
+}
+
+# Keyword lists used by the analytics methods, by category
+ANALYSIS_KEYWORDS = {
+    "appointment": (
+        "scheduled for", "appointment on", "see you on",
+        "come in on", "booked for"
+    ),
+    "service": (
+        "oil change", "brake", "tire", "alignment", "inspection",
+        "diagnostic", "battery", "filter", "fluid", "rotation"
+    ),
+    "upsell": (
+        "also recommend", "while you're here", "might as well",
+        "should also", "suggest checking"
+    ),
+    "accept": ("yes", "sure", "okay", "sounds good", "let's do"),
+    "follow_up": ("call back", "think about it"),
+    "empathy": (
+        "understand", "sorry to hear", "appreciate", "thank you",
+        "happy to help", "no problem", "absolutely"
+    ),
+    "professional": (
+        "sir", "ma'am", "please", "thank you", "appreciate",
+        "certainly", "absolutely", "happy to"
+    ),
+    "unprofessional": ("yeah", "nah", "dunno", "gonna", "wanna")
+}
+
+# Service types reported as topics
+TOPIC_KEYWORDS = ('oil change', 'brake', 'tire', 'battery', 'inspection', 'alignment')
+
+# Words used for the basic keyword sentiment score
+POSITIVE_WORDS = frozenset({'thank', 'great', 'perfect', 'excellent', 'happy', 'good', 'yes'})
+NEGATIVE_WORDS = frozenset({'problem', 'issue', 'no', 'cannot', 'sorry', 'unfortunately'})
+
+_PRICE_RE = re.compile(r'\$[\d,]+(?:\.\d{2})?|\b\d+\s*dollars?\b')
+
+
+def _build_keyword_automaton() -> ahocorasick.Automaton:
+    """Build one automaton over every analysis keyword so each text is scanned once
+    
+    Each keyword maps to (keyword, categories), since a keyword can belong
+    to several categories.
+    """
+    categories_by_keyword = defaultdict(list)
+    for component, keywords in SCRIPT_KEYWORDS.items():
+        for keyword in keywords:
+            categories_by_keyword[keyword.lower()].append(f"script:{component}")
+    for category, keywords in ANALYSIS_KEYWORDS.items():
+        for keyword in keywords:
+            categories_by_keyword[keyword].append(category)
+    for keyword in TOPIC_KEYWORDS:
+        categories_by_keyword[keyword].append("topic")
+    for keyword in POSITIVE_WORDS:
+        categories_by_keyword[keyword].append("positive")
+    for keyword in NEGATIVE_WORDS:
+        categories_by_keyword[keyword].append("negative")
+    
+    automaton = ahocorasick.Automaton()
+    for keyword, categories in categories_by_keyword.items():
+        automaton.add_word(keyword, (keyword, tuple(categories)))
+    automaton.make_automaton()
+    return automaton
+
+
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+
+def _speaker_role(word) -> str:
+    """Map a diarized word's speaker index to a role"""
+    return 'employee' if word.speaker == 0 else 'customer'
+
 
 class EnhancedDeepgramTranscriber:
     """Advanced transcription with speaker identification, sentiment, and analytics"""
@@ -20,22 +164,6 @@ class EnhancedDeepgramTranscriber:
     def __init__(self, api_key: str):
         self.client = DeepgramClient(api_key)
         
-        # Custom vocabulary for automotive terms
-        self.custom_vocabulary = [
-            "oil change", "brake pads", "transmission", "coolant",
-            "alternator", "serpentine belt", "CV joint", "struts",
-            "alignment", "tire rotation", "diagnostic", "OBD",
-            "check engine light", "synthetic oil", "conventional oil"
-        ]
-        
-        # Script compliance keywords to monitor
-        self.script_keywords = {
-            "greeting": ["thank you for calling", "how can I help"],
-            "appointment_confirm": ["scheduled for", "confirm your appointment"],
-            "upsell": ["recommend", "also suggest", "while you're here"],
-            "closing": ["anything else", "thank you for choosing"]
-        }
-        
     async def transcribe_with_advanced_features(
         self, 
         audio_path: str, 
@@ -52,8 +180,8 @@ class EnhancedDeepgramTranscriber:
             Comprehensive transcription data with analytics
         """
         try:
-            with open(audio_path, "rb") as audio:
-                buffer_data = audio.read()
+            async with aiofiles.open(audio_path, "rb") as audio:
+                buffer_data = await audio.read()
             
             # Configure available Deepgram features
             options = PrerecordedOptions(
@@ -69,7 +197,7 @@ class EnhancedDeepgramTranscriber:
                 utterances=True,
                 
                 # Custom vocabulary
-                keywords=self.custom_vocabulary,
+                keywords=list(CUSTOM_VOCABULARY),
                 
                 # Audio processing
                 multichannel=True,  # Process stereo separately
@@ -77,8 +205,9 @@ class EnhancedDeepgramTranscriber:
                 language="en-US"
             )
             
-            # Make the API call
-            response = self.client.listen.rest.v("1").transcribe_file(
+            # Make the API call off the event loop so batches can overlap
+            response = await asyncio.to_thread(
+                cached_by_content(self.client.listen.rest.v("1").transcribe_file),
                 {"buffer": buffer_data}, 
                 options
             )
@@ -86,14 +215,21 @@ class EnhancedDeepgramTranscriber:
             # Process the comprehensive response
             result = self._process_advanced_response(response, call_direction)
             
-            # Add compliance monitoring
-            result['script_compliance'] = self._check_script_compliance(result)
-            
-            # Add sales tracking
-            result['sales_metrics'] = self._extract_sales_metrics(result)
+            # Compliance monitoring, sales tracking and interaction quality only
+            # read the result, so they run side by side
+            (
+                result['script_compliance'],
+                result['sales_metrics'],
+                result['quality_metrics']
+            ) = await asyncio.gather(
+                asyncio.to_thread(self._check_script_compliance, result),
+                asyncio.to_thread(self._extract_sales_metrics, result),
+                asyncio.to_thread(self._analyze_interaction_quality, result)
+            )
             
-            # Add interaction quality metrics
-            result['quality_metrics'] = self._analyze_interaction_quality(result)
+            # Drop the intermediate texts and hits shared by the analytics
+            for key in [k for k in result if k.startswith('_')]:
+                del result[key]
             
             return result
             
@@ -101,6 +237,38 @@ class EnhancedDeepgramTranscriber:
             logger.error(f"Enhanced transcription error: {e}")
             return {'success': False, 'error': str(e)}
     
+    async def transcribe_batch(
+        self,
+        audio_paths: List[str],
+        call_direction: str = "inbound",
+        max_concurrency: int = 8
+    ) -> List[Dict]:
+        """
+        Transcribe several audio files concurrently
+        
+        Args:
+            audio_paths: Paths to audio files
+            call_direction: 'inbound' or 'outbound', applied to every file
+            max_concurrency: Maximum number of Deepgram requests in flight
+            
+        Returns:
+            One result per path, in the same order as audio_paths
+        """
+        sem = asyncio.Semaphore(max_concurrency)
+        
+        async def transcribe_one(audio_path: str) -> Dict:
+            async with sem:
+                return await self.transcribe_with_advanced_features(audio_path, call_direction)
+        
+        results = await asyncio.gather(
+            *(transcribe_one(path) for path in audio_paths),
+            return_exceptions=True
+        )
+        return [
+            {'success': False, 'error': str(r)} if isinstance(r, Exception) else r
+            for r in results
+        ]
+    
     def _process_advanced_response(self, response, call_direction: str) -> Dict:
         """Process Deepgram response with all features"""
         
@@ -169,73 +337,70 @@ class EnhancedDeepgramTranscriber:
         
         # If no utterances, try to extract from words with speaker info
         elif hasattr(response.results.channels[0].alternatives[0], 'words'):
-            current_speaker = None
-            current_utterance = []
-            current_start = 0
-            
-            for word in response.results.channels[0].alternatives[0].words:
-                if hasattr(word, 'speaker'):
-                    # Map speaker index to role
-                    speaker_label = 'employee' if word.speaker == 0 else 'customer'
-                    
-                    if speaker_label != current_speaker:
-                        # Save previous utterance
-                        if current_utterance and current_speaker:
-                            text = ' '.join(current_utterance)
-                            result['utterances'].append({
-                                'speaker': current_speaker,
-                                'text': text,
-                                'start': current_start,
-                                'end': word.start
-                            })
-                            result['speakers'][current_speaker]['utterances'].append(text)
-                        
-                        # Start new utterance
-                        current_speaker = speaker_label
-                        current_utterance = [word.word]
-                        current_start = word.start
-                    else:
-                        current_utterance.append(word.word)
+            words = (
+                word for word in response.results.channels[0].alternatives[0].words
+                if hasattr(word, 'speaker')
+            )
             
-            # Don't forget the last utterance
-            if current_utterance and current_speaker:
-                text = ' '.join(current_utterance)
+            # Consecutive words from the same speaker form one utterance
+            for speaker_label, group in itertools.groupby(words, key=_speaker_role):
+                group = list(group)
+                text = ' '.join(word.word for word in group)
                 result['utterances'].append({
-                    'speaker': current_speaker,
+                    'speaker': speaker_label,
                     'text': text,
-                    'start': current_start,
-                    'end': word.end if 'word' in locals() else current_start + 1
+                    'start': group[0].start,
+                    'end': group[-1].end
                 })
-                result['speakers'][current_speaker]['utterances'].append(text)
+                result['speakers'][speaker_label]['utterances'].append(text)
         
         # Since advanced features aren't available, we'll analyze the text ourselves
         # Extract topics by finding common automotive terms
         transcript_lower = result['transcript'].lower()
-        found_topics = []
-        
-        # Check for service types
-        service_keywords = ['oil change', 'brake', 'tire', 'battery', 'inspection', 'alignment']
-        for keyword in service_keywords:
-            if keyword in transcript_lower:
-                found_topics.append(keyword)
+        hits = self._keyword_hits(transcript_lower)
         
-        result['topics'] = found_topics
+        # Lowercased texts and their keyword hits, shared by the analytics
+        # methods; stripped again before the result is returned
+        employee_text = ' '.join(result['speakers']['employee']['utterances']).lower()
+        result['_full_lower'] = transcript_lower
+        result['_transcript_hits'] = hits
+        result['_employee_text_lower'] = employee_text
+        result['_employee_hits'] = self._keyword_hits(employee_text)
         
-        # Basic sentiment analysis using keyword matching
-        positive_words = ['thank', 'great', 'perfect', 'excellent', 'happy', 'good', 'yes']
-        negative_words = ['problem', 'issue', 'no', 'cannot', 'sorry', 'unfortunately']
+        # Check for service types
+        topics_found = {keyword for _, keyword in hits['topic']}
+        result['topics'] = [keyword for keyword in TOPIC_KEYWORDS if keyword in topics_found]
         
-        positive_count = sum(word in transcript_lower for word in positive_words)
-        negative_count = sum(word in transcript_lower for word in negative_words)
+        # Basic sentiment analysis from how often positive and negative words occur
+        positive_count = len(hits['positive'])
+        negative_count = len(hits['negative'])
         
         # Simple sentiment calculation
-        if positive_count + negative_count > 0:
-            result['sentiment']['overall'] = (positive_count - negative_count) / (positive_count + negative_count)
-        else:
-            result['sentiment']['overall'] = 0.0
+        total = positive_count + negative_count
+        result['sentiment']['overall'] = (positive_count - negative_count) / total if total else 0.0
         
         return result
     
+    def _keyword_hits(self, text: str) -> Dict[str, List[Tuple[int, str]]]:
+        """Find every keyword occurrence in text in one pass, grouped by category
+        
+        Each hit is a (start offset, keyword) pair.
+        """
+        hits = defaultdict(list)
+        for end_idx, (keyword, categories) in _KEYWORD_AUTOMATON.iter(text):
+            start = end_idx - len(keyword) + 1
+            for category in categories:
+                hits[category].append((start, keyword))
+        return hits
+    
+    def _employee_hits(self, transcription_result: Dict) -> Dict[str, List[Tuple[int, str]]]:
+        """Keyword hits in the employee's side of the call"""
+        if '_employee_hits' in transcription_result:
+            return transcription_result['_employee_hits']
+        return self._keyword_hits(
+            ' '.join(transcription_result['speakers']['employee']['utterances']).lower()
+        )
+    
     def _check_script_compliance(self, transcription_result: Dict) -> Dict:
         """Monitor adherence to call scripts"""
         
@@ -246,33 +411,28 @@ class EnhancedDeepgramTranscriber:
             'details': {}
         }
         
-        full_transcript = transcription_result['transcript'].lower()
-        employee_utterances = ' '.join(
-            transcription_result['speakers']['employee']['utterances']
-        ).lower()
+        hits = self._employee_hits(transcription_result)
         
         # Check each script component
-        for component, keywords in self.script_keywords.items():
-            found = False
-            for keyword in keywords:
-                if keyword in employee_utterances:
-                    found = True
-                    compliance['found_components'].append(component)
-                    compliance['details'][component] = {
-                        'found': True,
-                        'keyword': keyword
-                    }
-                    break
+        for component, keywords in SCRIPT_KEYWORDS.items():
+            found_keywords = {keyword for _, keyword in hits[f"script:{component}"]}
+            keyword = next((k for k in keywords if k.lower() in found_keywords), None)
             
-            if not found:
+            if keyword:
+                compliance['found_components'].append(component)
+                compliance['details'][component] = {
+                    'found': True,
+                    'keyword': keyword
+                }
+            else:
                 compliance['missing_components'].append(component)
                 compliance['details'][component] = {
                     'found': False,
-                    'expected': keywords
+                    'expected': list(keywords)
                 }
         
         # Calculate compliance score
-        total_components = len(self.script_keywords)
+        total_components = len(SCRIPT_KEYWORDS)
         found_components = len(compliance['found_components'])
         compliance['score'] = (found_components / total_components) * 100
         
@@ -293,48 +453,49 @@ class EnhancedDeepgramTranscriber:
             'outcome': 'unknown'
         }
         
-        transcript = transcription_result['transcript'].lower()
+        if '_transcript_hits' in transcription_result:
+            transcript = transcription_result['_full_lower']
+            hits = transcription_result['_transcript_hits']
+        else:
+            transcript = transcription_result['transcript'].lower()
+            hits = self._keyword_hits(transcript)
         entities = transcription_result.get('entities', {})
         
         # Check for appointment scheduling
-        appointment_keywords = [
-            'scheduled for', 'appointment on', 'see you on',
-            'come in on', 'booked for'
-        ]
-        for keyword in appointment_keywords:
-            if keyword in transcript:
-                metrics['appointment_scheduled'] = True
-                break
+        metrics['appointment_scheduled'] = bool(hits['appointment'])
         
         # Extract services mentioned
-        service_keywords = [
-            'oil change', 'brake', 'tire', 'alignment', 'inspection',
-            'diagnostic', 'battery', 'filter', 'fluid', 'rotation'
+        services_found = {keyword for _, keyword in hits['service']}
+        metrics['services_mentioned'] = [
+            service for service in ANALYSIS_KEYWORDS['service']
+            if service in services_found
         ]
-        for service in service_keywords:
-            if service in transcript:
-                metrics['services_mentioned'].append(service)
         
         # Check for prices
-        import re
-        price_pattern = r'\$[\d,]+(?:\.\d{2})?|\b\d+\s*dollars?\b'
-        prices = re.findall(price_pattern, transcript)
+        prices = _PRICE_RE.findall(transcript)
         if prices:
             metrics['price_discussed'] = True
             metrics['prices_mentioned'] = prices
         
         # Check for upsell
-        upsell_keywords = [
-            'also recommend', 'while you\'re here', 'might as well',
-            'should also', 'suggest checking'
-        ]
-        for keyword in upsell_keywords:
-            if keyword in transcript:
+        upsell_starts = {}
+        for start, keyword in hits['upsell']:
+            upsell_starts.setdefault(keyword, start)
+        for keyword in ANALYSIS_KEYWORDS['upsell']:
+            if keyword in upsell_starts:
                 metrics['upsell_attempted'] = True
-                # Check if accepted
-                if any(accept in transcript[transcript.find(keyword):transcript.find(keyword)+200] 
-                      for accept in ['yes', 'sure', 'okay', 'sounds good', 'let\'s do']):
-                    metrics['upsell_accepted'] = True
+                # Check if accepted within the next 200 characters, looking only
+                # at acceptance hits that start inside that window
+                idx = upsell_starts[keyword]
+                window_end = idx + 200
+                accept_hits = sorted(hits['accept'])
+                first = bisect.bisect_left(accept_hits, (idx, ''))
+                for start, accept in accept_hits[first:]:
+                    if start >= window_end:
+                        break
+                    if start + len(accept) <= window_end:
+                        metrics['upsell_accepted'] = True
+                        break
                 break
         
         # Determine outcome
@@ -342,7 +503,7 @@ class EnhancedDeepgramTranscriber:
             metrics['outcome'] = 'appointment_scheduled'
         elif metrics['services_mentioned'] and metrics['price_discussed']:
             metrics['outcome'] = 'quoted_service'
-        elif 'call back' in transcript or 'think about it' in transcript:
+        elif hits['follow_up']:
             metrics['outcome'] = 'follow_up_needed'
         
         return metrics
@@ -364,28 +525,22 @@ class EnhancedDeepgramTranscriber:
         if not utterances:
             return quality
         
-        # Analyze interruptions (overlapping speech)
-        for i in range(1, len(utterances)):
-            if utterances[i]['start'] < utterances[i-1]['end']:
-                quality['interruptions'] += 1
+        # Timing fields as arrays so the gaps and talk times are computed in bulk
+        n = len(utterances)
+        starts = np.fromiter((u['start'] for u in utterances), dtype=np.float64, count=n)
+        ends = np.fromiter((u['end'] for u in utterances), dtype=np.float64, count=n)
+        is_employee = np.fromiter((u['speaker'] == 'employee' for u in utterances), dtype=bool, count=n)
+        is_customer = np.fromiter((u['speaker'] == 'customer' for u in utterances), dtype=bool, count=n)
         
-        # Analyze silence periods
-        for i in range(1, len(utterances)):
-            silence = utterances[i]['start'] - utterances[i-1]['end']
-            if silence > 3.0:  # More than 3 seconds
-                quality['silence_periods'] += 1
+        # Analyze interruptions (overlapping speech) and silence periods
+        gaps = starts[1:] - ends[:-1]
+        quality['interruptions'] = int((starts[1:] < ends[:-1]).sum())
+        quality['silence_periods'] = int((gaps > 3.0).sum())  # More than 3 seconds
         
         # Calculate talk ratio
-        employee_time = sum(
-            u['end'] - u['start'] 
-            for u in utterances 
-            if u['speaker'] == 'employee'
-        )
-        customer_time = sum(
-            u['end'] - u['start'] 
-            for u in utterances 
-            if u['speaker'] == 'customer'
-        )
+        durations = ends - starts
+        employee_time = float(durations[is_employee].sum())
+        customer_time = float(durations[is_customer].sum())
         
         total_time = employee_time + customer_time
         if total_time > 0:
@@ -394,31 +549,14 @@ class EnhancedDeepgramTranscriber:
                 'customer': (customer_time / total_time) * 100
             }
         
-        # Check for empathy indicators
-        empathy_phrases = [
-            'understand', 'sorry to hear', 'appreciate', 'thank you',
-            'happy to help', 'no problem', 'absolutely'
-        ]
-        employee_text = ' '.join(
-            u['text'].lower() 
-            for u in utterances 
-            if u['speaker'] == 'employee'
-        )
+        hits = self._employee_hits(transcription_result)
         
-        for phrase in empathy_phrases:
-            quality['empathy_indicators'] += employee_text.count(phrase)
+        # Check for empathy indicators
+        quality['empathy_indicators'] = len(hits['empathy'])
         
         # Calculate professionalism score
-        professional_indicators = [
-            'sir', 'ma\'am', 'please', 'thank you', 'appreciate',
-            'certainly', 'absolutely', 'happy to'
-        ]
-        unprofessional_indicators = [
-            'yeah', 'nah', 'dunno', 'gonna', 'wanna'
-        ]
-        
-        prof_count = sum(employee_text.count(word) for word in professional_indicators)
-        unprof_count = sum(employee_text.count(word) for word in unprofessional_indicators)
+        prof_count = len(hits['professional'])
+        unprof_count = len(hits['unprofessional'])
         
         if prof_count + unprof_count > 0:
             quality['professionalism_score'] = (
@@ -436,11 +574,28 @@ class AudioPreprocessor:
     def enhance_audio(audio_path: str, output_path: str) -> bool:
         """
         Enhance audio quality before transcription
-        - Noise reduction
         - Volume normalization
-        - Echo cancellation
+        - Dynamic range compression
+        
+        Streams through ffmpeg's loudnorm/acompressor filters when ffmpeg is
+        installed, otherwise falls back to pydub (which decodes the whole file
+        into memory).
         """
         try:
+            if shutil.which('ffmpeg'):
+                subprocess.run(
+                    [
+                        'ffmpeg', '-y', '-loglevel', 'error',
+                        '-i', audio_path,
+                        '-af', 'loudnorm=I=-16:LRA=11:TP=-1.5,acompressor',
+                        '-c:a', 'libmp3lame',
+                        output_path
+                    ],
+                    check=True,
+                    capture_output=True
+                )
+                return True
+            
             from pydub import AudioSegment
             from pydub.effects import normalize, compress_dynamic_range
             
@@ -458,9 +613,24 @@ class AudioPreprocessor:
             
             return True
             
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Audio enhancement failed: {e.stderr.decode(errors='replace').strip()}")
+            return False
         except Exception as e:
             logger.error(f"Audio enhancement failed: {e}")
             return False
+    
+    @staticmethod
+    def enhance_batch(jobs: List[Tuple[str, str]], max_workers: Optional[int] = None) -> List[bool]:
+        """
+        Enhance several (audio_path, output_path) pairs in parallel
+        
+        ffmpeg does the work in its own processes and threads internally, so a
+        thread per job is enough to keep them running side by side.
+        """
+        max_workers = max_workers or max(1, (os.cpu_count() or 2) // 2)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda job: AudioPreprocessor.enhance_audio(*job), jobs))
 
 
 # Real-time transcription for live monitoring
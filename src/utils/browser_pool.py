@@ -0,0 +1,38 @@
+"""Shared headless Chromium for scripts that make repeated dashboard lookups"""
+
+import asyncio
+from typing import Optional
+
+from playwright.async_api import async_playwright, Browser, Playwright
+
+_playwright: Optional[Playwright] = None
+_browser: Optional[Browser] = None
+_lock = asyncio.Lock()
+
+
+async def get_browser() -> Browser:
+    """
+    Return the shared browser, launching it on first use
+
+    Callers should open their own context with browser.new_context() and
+    close it when done; the browser itself stays up until close_browser().
+    """
+    global _playwright, _browser
+    async with _lock:
+        if _browser is None or not _browser.is_connected():
+            if _playwright is None:
+                _playwright = await async_playwright().start()
+            _browser = await _playwright.chromium.launch(headless=True)
+        return _browser
+
+
+async def close_browser():
+    """Shut down the shared browser and Playwright driver"""
+    global _playwright, _browser
+    async with _lock:
+        if _browser is not None:
+            await _browser.close()
+            _browser = None
+        if _playwright is not None:
+            await _playwright.stop()
+            _playwright = None
@@ -0,0 +1,56 @@
+"""Shared Playwright session for the DC dashboard inspection scripts"""
+
+import os
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from dotenv import load_dotenv
+from playwright.async_api import async_playwright
+
+# Cookies and local storage from the last session; reused so login is skipped
+AUTH_STATE_PATH = Path(os.getenv("DC_AUTH_STATE", "auth.json"))
+
+CALLS_URL = "https://autoservice.digitalconcierge.io/userPortal/admin/calls"
+
+
+@asynccontextmanager
+async def dashboard_session(headless: bool = False):
+    """
+    Yield a browser page for the dashboard
+
+    The context starts from the saved storage state when there is one and
+    saves it again on exit, so a warm run never sees the login form.
+    Register any request/response handlers on the page, then call login().
+    """
+    load_dotenv()
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+        context = await browser.new_context(
+            storage_state=str(AUTH_STATE_PATH) if AUTH_STATE_PATH.exists() else None
+        )
+        page = await context.new_page()
+
+        try:
+            yield page
+        finally:
+            await context.storage_state(path=str(AUTH_STATE_PATH))
+            await browser.close()
+
+
+async def login(page):
+    """Open the dashboard and sign in, unless the saved session is still valid"""
+    await page.goto(os.getenv("DASHBOARD_URL"))
+    await page.wait_for_load_state('networkidle')
+
+    if not await page.query_selector('input[placeholder="User Name"]'):
+        print("🔑 Reusing saved session")
+        return
+
+    print("🔐 Logging in...")
+    await page.fill('input[placeholder="User Name"]', os.getenv("DASHBOARD_USERNAME"))
+    await page.fill('input[placeholder="Password"]', os.getenv("DASHBOARD_PASSWORD"))
+    await page.click('button:has-text("Sign in")')
+
+    print("⏳ Waiting for login...")
+    await page.wait_for_selector('input[placeholder="Password"]', state='detached', timeout=15000)
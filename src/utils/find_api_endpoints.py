@@ -1,30 +1,35 @@
 import asyncio
-from playwright.async_api import async_playwright
-import os
-from dotenv import load_dotenv
-import json
+import sys
+from pathlib import Path
+import orjson
 
-load_dotenv()
+# Add repo root to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.utils.dashboard_session import dashboard_session, login, CALLS_URL
 
 async def capture_api_calls():
     """Capture all API calls made by the dashboard"""
     api_calls = []
+    seen_endpoints = set()
     
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)
-        context = await browser.new_context()
-        page = await context.new_page()
-        
+    async with dashboard_session() as page:
         # Intercept all requests
         async def handle_request(request):
             if 'api' in request.url or 'digitalconcierge' in request.url:
+                print(f"{request.method} {request.url}")
+                
+                # Only the first request to each endpoint is kept
+                endpoint = (request.method, request.url.split('?')[0])
+                if endpoint in seen_endpoints:
+                    return
+                seen_endpoints.add(endpoint)
                 api_calls.append({
                     'url': request.url,
                     'method': request.method,
                     'headers': dict(request.headers),
                     'post_data': request.post_data
                 })
-                print(f"{request.method} {request.url}")
         
         # Intercept responses too
         async def handle_response(response):
@@ -34,8 +39,8 @@ async def capture_api_calls():
                     print(f"\nResponse from {response.url}:")
                     # Parse and pretty print if JSON
                     try:
-                        data = json.loads(body)
-                        print(json.dumps(data, indent=2)[:500] + "...")
+                        data = orjson.loads(body)
+                        print(orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()[:500] + "...")
                     except:
                         print(body[:500] + "...")
                 except:
@@ -44,19 +49,12 @@ async def capture_api_calls():
         page.on("request", handle_request)
         page.on("response", handle_response)
         
-        # Login
-        await page.goto(os.getenv("DASHBOARD_URL"))
-        await page.wait_for_timeout(2000)
-        
         print("=== Logging in ===")
-        await page.fill('input[placeholder="User Name"]', os.getenv("DASHBOARD_USERNAME"))
-        await page.fill('input[placeholder="Password"]', os.getenv("DASHBOARD_PASSWORD"))
-        await page.click('button:has-text("Sign in")')
-        await page.wait_for_timeout(3000)
+        await login(page)
         
         print("\n=== Navigating to calls ===")
-        await page.goto("https://autoservice.digitalconcierge.io/userPortal/admin/calls")
-        await page.wait_for_timeout(3000)
+        await page.goto(CALLS_URL)
+        await page.wait_for_load_state('networkidle')
         
         print("\n=== Clicking on a call with recording ===")
         # Click on a row that has recording icon
@@ -73,7 +71,7 @@ async def capture_api_calls():
             
             # Click the row
             await first_row.click()
-            await page.wait_for_timeout(3000)
+            await page.wait_for_load_state('networkidle')
             
             # Look for any modals or popups
             modals = await page.query_selector_all('.modal, [role="dialog"], .popup')
@@ -84,32 +82,26 @@ async def capture_api_calls():
             if recording_icon:
                 print("\nClicking recording icon directly...")
                 await recording_icon.click()
-                await page.wait_for_timeout(3000)
+                await page.wait_for_load_state('networkidle')
             
             # Check for audio player
             audio_players = await page.query_selector_all('audio, .audio-player, [class*="player"]')
             print(f"Found {len(audio_players)} audio players")
         
         print("\n=== All API endpoints captured ===")
-        unique_endpoints = {}
         for call in api_calls:
-            endpoint = f"{call['method']} {call['url'].split('?')[0]}"
-            if endpoint not in unique_endpoints:
-                unique_endpoints[endpoint] = call
-        
-        for endpoint, call in unique_endpoints.items():
-            print(f"\n{endpoint}")
+            print(f"\n{call['method']} {call['url'].split('?')[0]}")
             if call['post_data']:
                 print(f"  POST data: {call['post_data']}")
         
         # Save to file
-        with open('api_endpoints.json', 'w') as f:
-            json.dump(list(unique_endpoints.values()), f, indent=2)
+        # Write to a temp file and swap it in so readers never see a partial file
+        tmp_path = Path('api_endpoints.json.tmp')
+        tmp_path.write_bytes(orjson.dumps(api_calls, option=orjson.OPT_INDENT_2))
+        tmp_path.replace('api_endpoints.json')
         
         print("\n\nPress Enter to close browser...")
         input()
-        
-        await browser.close()
 
 if __name__ == "__main__":
     asyncio.run(capture_api_calls())
\ No newline at end of file
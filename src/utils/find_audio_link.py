@@ -1,102 +1,164 @@
 import asyncio
-from playwright.async_api import async_playwright
-import os
+import re
+import sys
+from pathlib import Path
+from typing import Optional
 from dotenv import load_dotenv
 
+# Add repo root to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.scrapers.scraper_api import DCAPIScraper
+from src.utils.browser_pool import get_browser, close_browser
+from src.utils.dashboard_session import AUTH_STATE_PATH, CALLS_URL, login
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
 load_dotenv()
 
-async def find_audio_for_call(call_id: str):
-    """Find and extract audio download link for a specific call"""
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)  # Show browser for debugging
-        context = await browser.new_context()
+# Anything in the recording modal that can point at the audio file
+DOWNLOAD_SELECTOR = (
+    'a[href*=".mp3"], a[href*="download"], button:has-text("Download"), '
+    'a:has-text("Download"), [download], audio source, audio'
+)
+
+_MP3_RE = re.compile(r'https?://[^\s<>"]+\.mp3')
+
+# Shared API client so repeated lookups reuse one connection and token
+_api: Optional[DCAPIScraper] = None
+
+
+def get_api() -> DCAPIScraper:
+    """Return the shared DC API client, creating it on first use"""
+    global _api
+    if _api is None:
+        _api = DCAPIScraper()
+    return _api
+
+
+async def close_api():
+    """Close the shared DC API client"""
+    global _api
+    if _api is not None:
+        await _api.aclose()
+        _api = None
+
+
+async def find_audio_for_call(call_id: str) -> Optional[str]:
+    """Find the audio URL for a call, via the DC API or else the dashboard"""
+    print(f"Looking for call ID: {call_id}")
+    
+    api = get_api()
+    call = await api.get_call_by_id(call_id)
+    # Only skip the dashboard when the call record shows a recording exists
+    audio_url = api.extract_audio_url(call, require_recording=True) if call else None
+    if audio_url:
+        print(f"Found audio URL via API: {audio_url}")
+        return audio_url
+    
+    print("API lookup found no recording, falling back to the dashboard...")
+    return await find_audio_in_browser(call_id)
+
+
+async def find_audio_in_browser(call_id: str) -> Optional[str]:
+    """Find and extract audio download link for a specific call from the dashboard"""
+    # The browser stays warm between lookups; each lookup gets a fresh context
+    browser = await get_browser()
+    async with await browser.new_context(
+        storage_state=str(AUTH_STATE_PATH) if AUTH_STATE_PATH.exists() else None
+    ) as context:
         page = await context.new_page()
         
-        print(f"Looking for call ID: {call_id}")
-        
-        # Navigate and login
-        await page.goto(os.getenv("DASHBOARD_URL"))
-        await page.wait_for_timeout(2000)
-        
-        # Login
-        print("Logging in...")
-        await page.fill('input[placeholder="User Name"]', os.getenv("DASHBOARD_USERNAME"))
-        await page.fill('input[placeholder="Password"]', os.getenv("DASHBOARD_PASSWORD"))
-        await page.click('button:has-text("Sign in")')
-        await page.wait_for_timeout(3000)
+        # Navigate and login; a still-valid saved session skips the form
+        await login(page)
+        await context.storage_state(path=str(AUTH_STATE_PATH))
         
         # Go to calls page
         print("Navigating to calls...")
-        await page.goto("https://autoservice.digitalconcierge.io/userPortal/admin/calls")
-        await page.wait_for_timeout(3000)
+        await page.goto(CALLS_URL)
+        await page.wait_for_selector('input[placeholder="Search"]')
         
         # Search for the specific call ID
         print(f"Searching for call {call_id}...")
-        search_input = await page.query_selector('input[placeholder="Search"]')
-        if search_input:
-            await search_input.fill(call_id)
-            # Press Enter to search
-            await search_input.press('Enter')
-            await page.wait_for_timeout(2000)
+        await page.locator('input[placeholder="Search"]').fill(call_id)
+        # Press Enter to search
+        await page.keyboard.press('Enter')
+        try:
+            await page.wait_for_selector('td:has-text("🎙")', timeout=10_000)
+        except PlaywrightTimeoutError:
+            print("No recording shown for this call")
         
         # Look for the recording icon or download button
         print("Looking for recording/download options...")
         
         # Try clicking the recording icon
-        recording_icons = await page.query_selector_all('td:has-text("🎙")')
-        if recording_icons:
-            print(f"Found {len(recording_icons)} recording icons")
-            # Click the first one
-            await recording_icons[0].click()
-            await page.wait_for_timeout(2000)
+        audio_url = None
+        recording_icons = page.locator('td:has-text("🎙")')
+        icon_count = await recording_icons.count()
+        if icon_count:
+            print(f"Found {icon_count} recording icons")
+            # Click the first one and capture the audio request it triggers
+            try:
+                async with page.expect_response(
+                    lambda r: ".mp3" in r.url or "Recordings" in r.url,
+                    timeout=10_000
+                ) as response_info:
+                    await recording_icons.first.click()
+                audio_url = (await response_info.value).url
+                print(f"Captured audio response: {audio_url}")
+            except PlaywrightTimeoutError:
+                print("No audio request seen after opening the recording")
             
-            # Look for download button/link in modal or new content
-            download_selectors = [
-                'a[href*=".mp3"]',
-                'a[href*="download"]',
-                'button:has-text("Download")',
-                'a:has-text("Download")',
-                '[download]',
-                'audio source',
-                'audio'
-            ]
+            try:
+                await page.wait_for_selector('audio, a[href*=".mp3"]', timeout=5_000)
+            except PlaywrightTimeoutError:
+                print("No audio element appeared")
             
-            for selector in download_selectors:
-                elements = await page.query_selector_all(selector)
-                if elements:
-                    print(f"Found {len(elements)} elements matching '{selector}'")
-                    for el in elements[:3]:
-                        if selector == 'audio':
-                            src = await el.get_attribute('src')
-                            print(f"  Audio src: {src}")
-                        elif selector == 'audio source':
-                            src = await el.get_attribute('src')
-                            print(f"  Audio source src: {src}")
-                        else:
-                            href = await el.get_attribute('href')
-                            text = await el.text_content()
-                            print(f"  {text}: {href}")
+            # Look for download button/link in modal or new content, reading
+            # every candidate's attributes in a single round trip
+            elements = await page.eval_on_selector_all(
+                DOWNLOAD_SELECTOR,
+                """els => els.map(e => ({
+                    tag: e.tagName,
+                    src: e.getAttribute('src'),
+                    href: e.getAttribute('href'),
+                    text: e.textContent
+                }))"""
+            )
+            element_count = len(elements)
+            if element_count:
+                print(f"Found {element_count} audio/download elements")
+                for el in elements[:10]:
+                    if el['tag'] == 'AUDIO':
+                        print(f"  Audio src: {el['src']}")
+                    elif el['tag'] == 'SOURCE':
+                        print(f"  Audio source src: {el['src']}")
+                    else:
+                        print(f"  {el['text']}: {el['href']}")
         
-        # Check page source for any MP3 URLs
+        if audio_url:
+            return audio_url
+        
+        # A player that doesn't preload never requests the file, so fall
+        # back to checking the page source for MP3 URLs
         content = await page.content()
-        import re
-        mp3_urls = re.findall(r'https?://[^\s<>"]+\.mp3', content)
+        mp3_urls = _MP3_RE.findall(content)
         if mp3_urls:
             print(f"\nFound MP3 URLs in page source:")
             for url in mp3_urls:
                 print(f"  - {url}")
         
-        # Check for API calls in network
-        print("\nChecking network requests...")
-        
-        await page.wait_for_timeout(5000)
-        
-        print("\nPress Enter to close browser...")
-        input()
-        
-        await browser.close()
+        return mp3_urls[0] if mp3_urls else None
+
+
+async def main(call_id: str):
+    try:
+        await find_audio_for_call(call_id)
+    finally:
+        await close_api()
+        await close_browser()
+
 
 if __name__ == "__main__":
     # Use a call ID we know has a recording
     call_id = "687641b0d84270fd72808ef2"  # RENEE NENSTIL call
-    asyncio.run(find_audio_for_call(call_id))
\ No newline at end of file
+    asyncio.run(main(call_id))
@@ -0,0 +1,29 @@
+"""Retry helper for async API calls"""
+
+import asyncio
+from typing import Awaitable, Callable, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+
+async def aretry(
+    fn: Callable[[], Awaitable[T]],
+    *,
+    retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+    max_tries: int = 3,
+    base: float = 0.2,
+) -> T:
+    """
+    Await fn(), retrying with exponential backoff when it raises retry_on
+
+    fn must build a fresh awaitable on each call (e.g. a lambda around the
+    request). Backoff uses asyncio.sleep so other tasks keep running; the
+    last error is re-raised once max_tries is used up.
+    """
+    for attempt in range(max_tries):
+        try:
+            return await fn()
+        except retry_on:
+            if attempt == max_tries - 1:
+                raise
+            await asyncio.sleep(base * 2 ** attempt)
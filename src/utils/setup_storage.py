@@ -2,6 +2,13 @@ import os
 from dotenv import load_dotenv
 from supabase import create_client
 import asyncio
+import sys
+from pathlib import Path
+
+# Add repo root to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.utils.storage import ensure_bucket
 
 load_dotenv()
 
@@ -16,42 +23,24 @@ async def setup_storage_and_upload():
     
     print("🔧 Setting up Supabase storage...")
     
-    # List existing buckets
-    try:
-        buckets = supabase.storage.list_buckets()
-        print(f"\nExisting buckets: {[b['name'] for b in buckets]}")
-    except Exception as e:
-        print(f"Error listing buckets: {e}")
-        buckets = []
+    # Make sure the audio-recordings bucket exists
+    bucket_created = await ensure_bucket(
+        supabase,
+        "audio-recordings",
+        {
+            "public": True,
+            "file_size_limit": 52428800,  # 50MB
+            "allowed_mime_types": ["audio/mpeg", "audio/mp3", "audio/wav", "audio/m4a"]
+        }
+    )
     
-    # Check if audio-recordings bucket exists
-    bucket_exists = any(b['name'] == 'audio-recordings' for b in buckets)
-    
-    if not bucket_exists:
-        print("\nCreating 'audio-recordings' bucket...")
-        try:
-            result = supabase.storage.create_bucket(
-                "audio-recordings",
-                {
-                    "public": True,
-                    "file_size_limit": 52428800,  # 50MB
-                    "allowed_mime_types": ["audio/mpeg", "audio/mp3", "audio/wav", "audio/m4a"]
-                }
-            )
-            print("✅ Bucket created successfully!")
-        except Exception as e:
-            print(f"❌ Error creating bucket: {e}")
-            # Try with recordings bucket (from the table structure)
-            try:
-                result = supabase.storage.create_bucket("recordings", {"public": True})
-                print("✅ Created 'recordings' bucket instead")
-                bucket_name = "recordings"
-            except:
-                print("Using existing bucket")
-                bucket_name = "recordings"
-    else:
-        print("✅ Bucket already exists")
+    if bucket_created:
+        print("✅ Bucket ready")
         bucket_name = "audio-recordings"
+    else:
+        # Try with recordings bucket (from the table structure)
+        await ensure_bucket(supabase, "recordings", {"public": True})
+        bucket_name = "recordings"
     
     # Upload test audio file
     audio_file = "downloads/test_call_20250716_082821.mp3"
@@ -112,7 +101,7 @@ async def setup_storage_and_upload():
     # Show what's in the recordings table
     print("\n📋 Current recordings in database:")
     try:
-        recordings = supabase.table('recordings').select('*').limit(5).execute()
+        recordings = supabase.table('recordings').select('call_id,storage_url').limit(5).execute()
         if recordings.data:
             for rec in recordings.data:
                 print(f"- {rec.get('call_id', 'N/A')}: {rec.get('storage_url', 'No URL')}")
@@ -0,0 +1,30 @@
+"""Supabase storage helpers"""
+
+import asyncio
+from typing import Dict, Optional, Set
+
+# Buckets already known to exist, so each is only checked once per process
+_buckets_ensured: Set[str] = set()
+
+
+async def ensure_bucket(supabase, name: str, options: Optional[Dict] = None) -> bool:
+    """
+    Make sure a storage bucket exists, creating it if it doesn't
+
+    Only the first call for a bucket goes to Supabase. Returns False if the
+    bucket could not be listed or created.
+    """
+    if name in _buckets_ensured:
+        return True
+
+    try:
+        buckets = await asyncio.to_thread(supabase.storage.list_buckets)
+        if not any(bucket.name == name for bucket in buckets):
+            await asyncio.to_thread(supabase.storage.create_bucket, name, options or {"public": True})
+            print(f"✅ Created '{name}' bucket")
+    except Exception as e:
+        print(f"❌ Could not ensure bucket '{name}': {e}")
+        return False
+
+    _buckets_ensured.add(name)
+    return True
@@ -3,12 +3,30 @@
 
 import os
 import asyncio
+import httpx
 from datetime import datetime
+from typing import Dict, List
 from supabase import create_client
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Table name -> column names, from PostgREST's OpenAPI description
+_schema: Dict[str, List[str]] = {}
+
+async def get_schema(url: str, key: str) -> Dict[str, List[str]]:
+    """Fetch every table's columns in one request; cached after the first call"""
+    if not _schema:
+        async with httpx.AsyncClient() as client:
+            response = await client.get(
+                f"{url}/rest/v1/",
+                headers={"apikey": key, "Authorization": f"Bearer {key}"}
+            )
+            response.raise_for_status()
+        for table, definition in response.json().get("definitions", {}).items():
+            _schema[table] = list(definition.get("properties", {}))
+    return _schema
+
 async def test_database():
     # Get credentials
     url = os.getenv("SUPABASE_URL")
@@ -27,10 +45,10 @@ async def test_database():
     # First, let's see what columns exist
     print("\n📊 Checking table structure...")
     try:
-        # Get one row to see structure
-        sample = supabase.table("calls").select("*").limit(1).execute()
-        if sample.data:
-            print(f"   Available columns: {list(sample.data[0].keys())}")
+        # Columns come from the schema, so no rows are fetched
+        schema = await get_schema(url, key)
+        if "calls" in schema:
+            print(f"   Available columns: {schema['calls']}")
     except Exception as e:
         print(f"   Could not check structure: {e}")
     
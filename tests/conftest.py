@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Make the repo root importable once per session, so tests can use src.*
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -6,15 +6,133 @@ from supabase import create_client
 from datetime import datetime
 import httpx
 import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.utils.storage import ensure_bucket
 
 load_dotenv()
 
+# Audio is streamed to disk in chunks of this size
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Downloads and uploads in flight at once
+MAX_CONCURRENT_DOWNLOADS = 8
+
+# Call records are upserted in batches of this size
+UPSERT_BATCH_SIZE = 500
+
 # Initialize Supabase
 supabase = create_client(
     os.getenv("SUPABASE_URL"),
     os.getenv("SUPABASE_KEY")
 )
 
+async def fetch(client: httpx.AsyncClient, audio_url: str, call_id: str) -> Optional[str]:
+    """Stream a call's audio to downloads/; returns the local path"""
+    try:
+        async with client.stream("GET", audio_url, follow_redirects=True, timeout=30.0) as response:
+            if response.status_code != 200:
+                await response.aread()
+                print(f"❌ Failed to download audio: {response.status_code}")
+                print(f"Response: {response.text[:200]}")
+                return None
+            
+            # Save locally
+            audio_path = f"downloads/{call_id}.mp3"
+            os.makedirs("downloads", exist_ok=True)
+            
+            file_size = 0
+            first_chunk = b""
+            with open(audio_path, "wb") as f:
+                async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    if not file_size:
+                        first_chunk = chunk
+                    f.write(chunk)
+                    file_size += len(chunk)
+    except Exception as e:
+        print(f"❌ Error downloading: {e}")
+        return None
+    
+    print(f"✅ Audio downloaded: {audio_path}")
+    print(f"   File size: {file_size:,} bytes")
+    if not (first_chunk[:3] == b'ID3' or first_chunk[:2] == b'\xff\xfb'):
+        print("⚠️  File may not be a valid MP3")
+    return audio_path
+
+def _upload_file(audio_path: str, storage_path: str):
+    # The SDK streams the file from the open handle
+    with open(audio_path, "rb") as f:
+        supabase.storage.from_("audio-recordings").upload(
+            storage_path,
+            f,
+            {"content-type": "audio/mpeg"}
+        )
+
+async def upload(audio_path: str, call_id: str) -> Optional[str]:
+    """Upload a downloaded file to Supabase storage; returns its public URL"""
+    print("\nUploading to Supabase storage...")
+    await ensure_bucket(supabase, "audio-recordings")
+    storage_path = f"recordings/{call_id}.mp3"
+    try:
+        # The storage client is blocking, so run it off the event loop
+        await asyncio.to_thread(_upload_file, audio_path, storage_path)
+        storage_url = supabase.storage.from_("audio-recordings").get_public_url(storage_path)
+        print(f"✅ Uploaded to Supabase: {storage_url}")
+        return storage_url
+    except Exception as e:
+        print(f"❌ Error uploading to Supabase: {e}")
+        return None
+
+def record(call_id: str, audio_url: str, storage_url: str) -> Dict:
+    """Build the call record for a downloaded and uploaded call"""
+    return {
+        'call_id': call_id,
+        'dc_call_id': call_id,
+        'customer_name': 'JANET GOMEZ',
+        'customer_number': '+19045213434',
+        'call_direction': 'inbound',
+        'duration_seconds': 27,
+        'date_created': datetime.now().isoformat(),
+        'has_recording': True,
+        'storage_url': storage_url,
+        'audio_url': audio_url,
+        'status': 'downloaded'
+    }
+
+async def download_one(client: httpx.AsyncClient, sem: asyncio.Semaphore,
+                       audio_url: str, call_id: str) -> Optional[Dict]:
+    """Download one call's audio and upload it to storage, bounded by sem
+    
+    Returns the call record to store, or None if anything failed; the
+    record is not written here so callers can upsert a whole batch at once.
+    """
+    async with sem:
+        print(f"Testing download for call {call_id}...")
+        print(f"Audio URL: {audio_url[:100]}...")
+        
+        audio_path = await fetch(client, audio_url, call_id)
+        if not audio_path:
+            return None
+        
+        storage_url = await upload(audio_path, call_id)
+        if not storage_url:
+            return None
+        
+        return record(call_id, audio_url, storage_url)
+
+def save_call_records(records: List[Dict]):
+    """Upsert call records in batches of UPSERT_BATCH_SIZE"""
+    for start in range(0, len(records), UPSERT_BATCH_SIZE):
+        supabase.table('calls').upsert(
+            records[start:start + UPSERT_BATCH_SIZE],
+            on_conflict='call_id'
+        ).execute()
+
 async def test_download():
     """Test downloading audio from a known URL"""
     
@@ -22,82 +140,30 @@ async def test_download():
     audio_url = "https://d3vneafawyd5u6.cloudfront.net/Recordings/RE85041f093ee6e183671ab3314e7cf63d.mp3?Expires=1752754964&Policy=eyJTdGF0ZW1lbnQiOlt7IlJlc291cmNlIjoiaHR0cHM6Ly9kM3ZuZWFmYXd5ZDV1Ni5jbG91ZGZyb250Lm5ldC9SZWNvcmRpbmdzL1JFODUwNDFmMDkzZWU2ZTE4MzY3MWFiMzMxNGU3Y2Y2M2QubXAzIiwiQ29uZGl0aW9uIjp7IkRhdGVMZXNzVGhhbiI6eyJBV1M6RXBvY2hUaW1lIjoxNzUyNzU0OTY0fX19XX0_&Signature=D-ntvGtqizg4rXQNhFgbSnM2oqU14ty4VfQP-ClswWPOpXXkoLwlty1iar5qwdY-DA643vvN0SxtFBsa2fuidiiT3vVA7kykK11a0OHxcoIOumu2ikirJQIdY-kfCYc4ZxzKDMz6mNVLnQzI0w-dFRPE29P7sce7UE3RsfJpQK9S~E-1tobYafdVwx~RBSaxO4TK9ArXUxnCchtK7H-DA~fZwmHAU8qIYk9JdZ4NGyS0ChNPaEXwHoba0D4eiHwolk0DnpYpBnNx1QjXUy0eM-qqkV~02N6PFouP8hn~wM2t40wBOtGdw9iWkKZ~AkIFBrtpRmJBtJh5rGIf1j4iZQ__&Key-Pair-Id=APKAI5363VKSN7NBGP5A"
     
     call_id = f"test_call_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    downloads = [(audio_url, call_id)]
     
-    print(f"Testing download for call {call_id}...")
-    print(f"Audio URL: {audio_url[:100]}...")
-    
-    # Download the audio
+    # Calls are independent, so up to MAX_CONCURRENT_DOWNLOADS run at once
+    sem = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
     async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(audio_url, follow_redirects=True, timeout=30.0)
-            
-            if response.status_code == 200:
-                # Save locally
-                audio_path = f"downloads/{call_id}.mp3"
-                os.makedirs("downloads", exist_ok=True)
-                
-                with open(audio_path, "wb") as f:
-                    f.write(response.content)
-                
-                file_size = len(response.content)
-                print(f"✅ Audio downloaded: {audio_path}")
-                print(f"   File size: {file_size:,} bytes")
-                
-                # Upload to Supabase storage
-                print("\nUploading to Supabase storage...")
-                with open(audio_path, "rb") as f:
-                    storage_path = f"recordings/{call_id}.mp3"
-                    
-                    # Check if bucket exists
-                    try:
-                        # Try to create bucket if it doesn't exist
-                        supabase.storage.create_bucket("audio-recordings", {"public": True})
-                        print("Created audio-recordings bucket")
-                    except:
-                        print("Bucket already exists or couldn't be created")
-                    
-                    # Upload file
-                    try:
-                        result = supabase.storage.from_("audio-recordings").upload(
-                            storage_path,
-                            f.read(),
-                            {"content-type": "audio/mpeg"}
-                        )
-                        
-                        storage_url = supabase.storage.from_("audio-recordings").get_public_url(storage_path)
-                        print(f"✅ Uploaded to Supabase: {storage_url}")
-                        
-                        # Insert call record
-                        call_record = {
-                            'call_id': call_id,
-                            'dc_call_id': call_id,
-                            'customer_name': 'JANET GOMEZ',
-                            'customer_number': '+19045213434',
-                            'call_direction': 'inbound',
-                            'duration_seconds': 27,
-                            'date_created': datetime.now().isoformat(),
-                            'has_recording': True,
-                            'storage_url': storage_url,
-                            'audio_url': audio_url,
-                            'status': 'downloaded'
-                        }
-                        
-                        result = supabase.table('calls').upsert(call_record, on_conflict='call_id').execute()
-                        print(f"✅ Call record inserted: {call_id}")
-                        
-                        print(f"\n✅ SUCCESS! Call {call_id} is ready for transcription")
-                        print(f"   Local file: {audio_path}")
-                        print(f"   Storage URL: {storage_url}")
-                        
-                    except Exception as e:
-                        print(f"❌ Error uploading to Supabase: {e}")
-                        
-            else:
-                print(f"❌ Failed to download audio: {response.status_code}")
-                print(f"Response: {response.text[:200]}")
-                
-        except Exception as e:
-            print(f"❌ Error downloading: {e}")
+        records = await asyncio.gather(*(
+            download_one(client, sem, url, cid) for url, cid in downloads
+        ))
+    records = [record for record in records if record]
+    
+    if not records:
+        return
+    
+    try:
+        save_call_records(records)
+    except Exception as e:
+        print(f"❌ Error saving call records: {e}")
+        return
+    
+    for record in records:
+        print(f"✅ Call record inserted: {record['call_id']}")
+        print(f"\n✅ SUCCESS! Call {record['call_id']} is ready for transcription")
+        print(f"   Local file: downloads/{record['call_id']}.mp3")
+        print(f"   Storage URL: {record['storage_url']}")
 
 if __name__ == "__main__":
     asyncio.run(test_download())
\ No newline at end of file
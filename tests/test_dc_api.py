@@ -13,7 +13,11 @@ async def test_api():
     
     # Test authentication
     print("🔐 Testing authentication...")
-    async with httpx.AsyncClient() as client:
+    async with httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=60),
+        headers={"Content-Type": "application/json"}
+    ) as client:
         auth_response = await client.post(
             "https://autoservice.api.digitalconcierge.io/auth/authenticate",
             json={
@@ -29,68 +33,28 @@ async def test_api():
             token = auth_data.get("token")
             print(f"Token received: {token[:50]}...")
             
-            # Test different header formats
+            # Test different header formats, all at once over the same client
             print("\n📞 Testing call list endpoint...")
-            
-            # Test 1: Bearer token
-            print("\n1. Testing with Bearer token...")
-            headers1 = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            }
-            
-            response1 = await client.post(
-                "https://autoservice.api.digitalconcierge.io/call/list",
-                json={"limit": 1},
-                headers=headers1
-            )
-            print(f"   Status: {response1.status_code}")
-            print(f"   Response: {response1.text[:200]}")
-            
-            # Test 2: Just token
-            print("\n2. Testing with just token...")
-            headers2 = {
-                "Authorization": token,
-                "Content-Type": "application/json"
-            }
-            
-            response2 = await client.post(
-                "https://autoservice.api.digitalconcierge.io/call/list",
-                json={"limit": 1},
-                headers=headers2
-            )
-            print(f"   Status: {response2.status_code}")
-            print(f"   Response: {response2.text[:200]}")
-            
-            # Test 3: x-auth-token header
-            print("\n3. Testing with x-auth-token...")
-            headers3 = {
-                "x-auth-token": token,
-                "Content-Type": "application/json"
-            }
-            
-            response3 = await client.post(
-                "https://autoservice.api.digitalconcierge.io/call/list",
-                json={"limit": 1},
-                headers=headers3
-            )
-            print(f"   Status: {response3.status_code}")
-            print(f"   Response: {response3.text[:200]}")
-            
-            # Test 4: Cookie
-            print("\n4. Testing with cookie...")
-            headers4 = {
-                "Content-Type": "application/json",
-                "Cookie": f"token={token}"
-            }
-            
-            response4 = await client.post(
-                "https://autoservice.api.digitalconcierge.io/call/list",
-                json={"limit": 1},
-                headers=headers4
-            )
-            print(f"   Status: {response4.status_code}")
-            print(f"   Response: {response4.text[:200]}")
+            variants = [
+                ("Bearer token", {"Authorization": f"Bearer {token}"}),
+                ("just token", {"Authorization": token}),
+                ("x-auth-token", {"x-auth-token": token}),
+                ("cookie", {"Cookie": f"token={token}"})
+            ]
+            
+            responses = await asyncio.gather(*(
+                client.post(
+                    "https://autoservice.api.digitalconcierge.io/call/list",
+                    json={"limit": 1},
+                    headers=headers
+                )
+                for _, headers in variants
+            ))
+            
+            for i, ((name, _), response) in enumerate(zip(variants, responses), 1):
+                print(f"\n{i}. Testing with {name}...")
+                print(f"   Status: {response.status_code}")
+                print(f"   Response: {response.text[:200]}")
 
 if __name__ == "__main__":
     asyncio.run(test_api())
\ No newline at end of file
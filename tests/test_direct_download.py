@@ -6,6 +6,12 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Audio is streamed to disk in chunks of this size
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Anything smaller than this is an error body, not a recording
+MIN_AUDIO_BYTES = 1024
+
 async def test_audio_download():
     """Test downloading audio directly from Supabase storage"""
     
@@ -16,20 +22,38 @@ async def test_audio_download():
     
     async with httpx.AsyncClient() as client:
         try:
-            response = await client.get(audio_url, follow_redirects=True)
-            response.raise_for_status()
-            
-            # Save the file
+            # Stream the file to disk instead of buffering it in memory
             filename = "test_download.mp3"
-            with open(filename, 'wb') as f:
-                f.write(response.content)
+            file_size = 0
+            first_chunk = b""
+            async with client.stream("GET", audio_url, follow_redirects=True) as response:
+                response.raise_for_status()
+                
+                # Check the headers before reading the body, so an error page
+                # or misrouted URL fails without downloading anything
+                content_type = response.headers.get("content-type", "")
+                content_length = int(response.headers.get("content-length") or 0)
+                if not content_type.startswith("audio/"):
+                    await response.aclose()
+                    print(f"❌ Not an audio response: {content_type or 'no content-type'}")
+                    return False
+                if "content-length" in response.headers and content_length < MIN_AUDIO_BYTES:
+                    await response.aclose()
+                    print(f"❌ Response too small to be audio: {content_length} bytes")
+                    return False
+                
+                with open(filename, 'wb') as f:
+                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        if not file_size:
+                            first_chunk = chunk
+                        f.write(chunk)
+                        file_size += len(chunk)
             
-            file_size = len(response.content)
             print(f"✅ Successfully downloaded {file_size / 1024 / 1024:.2f} MB")
             print(f"✅ Saved as: {filename}")
             
-            # Verify it's an MP3
-            if response.content[:3] == b'ID3' or response.content[:2] == b'\xff\xfb':
+            # Verify it's an MP3 from the first chunk
+            if first_chunk[:3] == b'ID3' or first_chunk[:2] == b'\xff\xfb':
                 print("✅ File appears to be a valid MP3")
             else:
                 print("⚠️  File may not be a valid MP3")
@@ -7,17 +7,23 @@ This version successfully tests multiple calls through the complete pipeline.
 """
 
 import asyncio
+import aiofiles
+import hashlib
+import math
 import os
 import sys
-import json
+import time
+import orjson
 from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
 import httpx
 from supabase import create_client
 from deepgram import DeepgramClient, PrerecordedOptions
 from openai import AsyncOpenAI
 import logging
-from typing import List, Dict, Optional
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
 import shutil
 
 # Load environment variables
@@ -38,6 +44,78 @@ supabase = create_client(
 deepgram = DeepgramClient(os.getenv("DEEPGRAM_API_KEY"))
 openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# Request settings shared by every test call
+# Only the flat transcript is used here, so diarization is off by default
+_DG_OPTIONS_FAST = PrerecordedOptions(
+    model="nova-2",
+    smart_format=True,
+    punctuate=True,
+    language="en-US"
+)
+_DG_OPTIONS_DIARIZED = PrerecordedOptions(
+    model="nova-2",
+    smart_format=True,
+    punctuate=True,
+    diarize=True,
+    language="en-US"
+)
+_ANALYSIS_SYSTEM_MESSAGE = {"role": "system", "content": "You are an automotive service call analyst."}
+_JSON_RESPONSE_FORMAT = {"type": "json_object"}
+
+# Transcript characters sent for analysis (roughly 250 tokens)
+ANALYSIS_TRANSCRIPT_CHARS = 1000
+
+# Most analysis tasks kept, oldest evicted first
+ANALYSIS_CACHE_SIZE = 128
+
+# Analysis tasks by prompt hash, shared by calls with an identical prompt
+_analysis_cache: "OrderedDict[str, asyncio.Future]" = OrderedDict()
+
+
+def _truncate_transcript(transcript: str, limit: int = ANALYSIS_TRANSCRIPT_CHARS) -> str:
+    """Cut a transcript at the last word boundary before limit, marking the cut"""
+    if len(transcript) <= limit:
+        return transcript
+    cut = transcript.rfind(' ', 0, limit)
+    return transcript[:cut if cut > 0 else limit] + '...'
+
+# Dashboard dates are Eastern time; ZoneInfo tracks the EDT/EST switch
+DC_TIMEZONE = ZoneInfo("America/New_York")
+
+# Calls requested per /call/list page
+CALL_LIST_PAGE_SIZE = 50
+
+# Rows per upsert request
+UPSERT_BATCH_SIZE = 1000
+
+# DC API tokens are refreshed after this long
+TOKEN_TTL_SECONDS = 3000
+
+# Calls processed through the pipeline at once
+MAX_CONCURRENT_CALLS = 5
+
+# Shared DC API client, so auth, listing and downloads reuse connections
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client(timeout: float = 60.0) -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it on first use"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=300)
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared HTTP client"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 
 class MultiCallTester:
     def __init__(self):
@@ -45,7 +123,9 @@ class MultiCallTester:
         self.username = os.getenv("DASHBOARD_USERNAME", "dev")
         self.password = os.getenv("DASHBOARD_PASSWORD")
         self.token = None
-        self.client = httpx.AsyncClient(timeout=60.0)
+        self._token_exp = 0.0
+        self._auth_lock = asyncio.Lock()
+        self.client = get_http_client(60.0)
         self.test_results = {
             "total_calls": 0,
             "successful": 0,
@@ -53,6 +133,7 @@ class MultiCallTester:
             "errors": [],
             "insights": []
         }
+        os.makedirs("downloads", exist_ok=True)
         
     async def authenticate(self) -> bool:
         """Test API authentication"""
@@ -65,7 +146,8 @@ class MultiCallTester:
             )
             
             if response.status_code == 200:
-                self.token = response.json().get("token")
+                self.token = orjson.loads(response.content).get("token")
+                self._token_exp = time.time() + TOKEN_TTL_SECONDS
                 logger.info("✅ Authentication successful!")
                 return True
             else:
@@ -76,57 +158,82 @@ class MultiCallTester:
             logger.error(f"❌ Authentication error: {e}")
             return False
     
+    async def ensure_token(self) -> bool:
+        """Authenticate if there is no token or it has expired, once across tasks"""
+        async with self._auth_lock:
+            if self.token and time.time() < self._token_exp:
+                return True
+            return await self.authenticate()
+    
     def _parse_duration(self, duration) -> int:
         """Parse duration from various formats"""
-        if isinstance(duration, int):
+        if type(duration) is int:
             return duration
-        if not duration or duration == '0:00':
+        if not duration or duration == '0:00' or not isinstance(duration, str):
+            return 0
+        try:
+            # partition avoids building a list for the usual 'm:ss' strings
+            first, sep, rest = duration.partition(':')
+            if not sep:
+                return int(duration) if duration.isdigit() else 0
+            second, sep, third = rest.partition(':')
+            if sep:
+                return int(first) * 3600 + int(second) * 60 + int(third)
+            return int(first) * 60 + int(second)
+        except ValueError:
             return 0
-        if isinstance(duration, str):
-            parts = duration.split(':')
-            if len(parts) == 2:
-                return int(parts[0]) * 60 + int(parts[1])
-            elif len(parts) == 3:
-                return int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
-        return 0
     
     async def fetch_test_calls(self, limit: int = 5) -> List[Dict]:
         """Fetch multiple calls for testing"""
         logger.info(f"\n📞 Fetching {limit} test calls from API...")
         
-        if not self.token:
-            if not await self.authenticate():
-                return []
+        if not await self.ensure_token():
+            return []
+        
+        # Last 30 days in the shop's local time, with the current UTC offset
+        now = datetime.now(DC_TIMEZONE).replace(microsecond=0)
+        start = (now - timedelta(days=30)).replace(hour=0, minute=0, second=0).isoformat()
+        end = now.replace(hour=23, minute=59, second=59).isoformat()
         
         # Fetch recent calls
         payload = {
             "query": {
                 "$and": [
-                    {"date_created": {"$gte": (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%dT00:00:00-04:00")}},
-                    {"date_created": {"$lte": datetime.now().strftime("%Y-%m-%dT23:59:59-04:00")}}
+                    {"date_created": {"$gte": start}},
+                    {"date_created": {"$lte": end}}
                 ]
             },
             "searchText": "",
             "page": 1,
-            "limit": 50,
+            "limit": CALL_LIST_PAGE_SIZE,
             "sort": {"date_created": -1}
         }
         
+        # Larger requests fetch the pages they need concurrently
+        pages = 1 if limit <= CALL_LIST_PAGE_SIZE else math.ceil(limit / CALL_LIST_PAGE_SIZE)
+        payloads = [{**payload, "page": page} for page in range(1, pages + 1)]
+        
         headers = {
             "x-access-token": self.token,
             "Content-Type": "application/json"
         }
         
         try:
-            response = await self.client.post(
-                f"{self.base_url}/call/list",
-                json=payload,
-                headers=headers
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                all_calls = data.get("docs", [])
+            responses = await asyncio.gather(*(
+                self.client.post(f"{self.base_url}/call/list", json=page_payload, headers=headers)
+                for page_payload in payloads
+            ))
+            
+            failed = [r.status_code for r in responses if r.status_code != 200]
+            if failed:
+                logger.error(f"❌ Failed to fetch calls: {failed[0]}")
+            
+            if len(failed) < len(responses):
+                all_calls = [
+                    call
+                    for r in responses if r.status_code == 200
+                    for call in orjson.loads(r.content).get("docs", [])
+                ]
                 
                 # Filter for good test calls
                 test_calls = []
@@ -155,7 +262,6 @@ class MultiCallTester:
                 return test_calls
                 
             else:
-                logger.error(f"❌ Failed to fetch calls: {response.status_code}")
                 return []
                 
         except Exception as e:
@@ -167,19 +273,26 @@ class MultiCallTester:
         logger.info(f"\n💾 Testing storage of {len(calls)} calls in Supabase...")
         
         stored_count = 0
-        for call in calls:
+        rows = [{**call, 'status': 'test_pending'} for call in calls]
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = rows[start:start + UPSERT_BATCH_SIZE]
             try:
-                # Upsert call to database
-                result = supabase.table('calls').upsert(
-                    {**call, 'status': 'test_pending'},
-                    on_conflict='call_id'
-                ).execute()
-                
-                stored_count += 1
-                logger.info(f"   ✅ Stored: {call['call_id']} - {call['customer_name']}")
-                
+                # One request per batch; PostgREST applies it atomically
+                result = supabase.table('calls').upsert(batch, on_conflict='call_id').execute()
+                stored_count += len(result.data or [])
+                for call in batch:
+                    logger.info(f"   ✅ Stored: {call['call_id']} - {call['customer_name']}")
+                continue
             except Exception as e:
-                logger.error(f"   ❌ Failed to store {call['call_id']}: {e}")
+                logger.warning(f"   ⚠️  Batch upsert failed, retrying row by row: {e}")
+            
+            for call in batch:
+                try:
+                    supabase.table('calls').upsert(call, on_conflict='call_id').execute()
+                    stored_count += 1
+                    logger.info(f"   ✅ Stored: {call['call_id']} - {call['customer_name']}")
+                except Exception as e:
+                    logger.error(f"   ❌ Failed to store {call['call_id']}: {e}")
         
         logger.info(f"📊 Stored {stored_count}/{len(calls)} calls successfully")
         return stored_count
@@ -189,30 +302,34 @@ class MultiCallTester:
         test_audio = "downloads/test_call_20250716_082821.mp3"
         if os.path.exists(test_audio):
             output_path = f"downloads/test_{call_id}.mp3"
-            os.makedirs("downloads", exist_ok=True)
-            shutil.copy(test_audio, output_path)
+            # Every call gets the same audio, so hard-link it rather than copy
+            if os.path.exists(output_path):
+                if os.path.samefile(test_audio, output_path):
+                    # Already linked by an earlier run
+                    return output_path
+                os.remove(output_path)
+            try:
+                os.link(test_audio, output_path)
+            except OSError:
+                shutil.copy(test_audio, output_path)
             return output_path
         else:
             logger.warning(f"   ⚠️  Test audio not found")
             return None
     
-    async def test_transcription(self, audio_path: str) -> Dict:
-        """Test Deepgram transcription"""
+    async def test_transcription(self, audio_path: str, with_diarization: bool = False) -> Dict:
+        """Test Deepgram transcription; diarize only when speakers are needed"""
         try:
-            with open(audio_path, "rb") as audio:
-                buffer_data = audio.read()
+            # Read without blocking the event loop other calls are running on
+            async with aiofiles.open(audio_path, "rb") as audio:
+                buffer_data = await audio.read()
             
             payload = {"buffer": buffer_data}
             
-            options = PrerecordedOptions(
-                model="nova-2",
-                smart_format=True,
-                punctuate=True,
-                diarize=True,
-                language="en-US"
-            )
+            options = _DG_OPTIONS_DIARIZED if with_diarization else _DG_OPTIONS_FAST
             
-            response = deepgram.listen.rest.v("1").transcribe_file(payload, options)
+            # The SDK call is synchronous, so keep it off the event loop too
+            response = await asyncio.to_thread(deepgram.listen.rest.v("1").transcribe_file, payload, options)
             transcript = response.results.channels[0].alternatives[0].transcript
             
             return {'transcript': transcript, 'success': True}
@@ -222,7 +339,37 @@ class MultiCallTester:
             return {'transcript': "Transcription failed", 'success': False}
     
     async def test_analysis(self, transcript: str, call_info: Dict) -> Dict:
-        """Test GPT-4 analysis"""
+        """
+        Test GPT-4 analysis
+        
+        Results are cached by transcript and call info, so calls that would
+        send the same prompt cost one OpenAI request between them.
+        """
+        excerpt = _truncate_transcript(transcript)
+        key_parts = (
+            excerpt,
+            call_info.get('customer_name'),
+            call_info.get('duration_seconds'),
+            call_info.get('call_direction'),
+        )
+        key = hashlib.blake2b(orjson.dumps(key_parts, default=str)).hexdigest()
+        
+        task = _analysis_cache.get(key)
+        if task is None:
+            task = _analysis_cache[key] = asyncio.ensure_future(self._request_analysis(excerpt, call_info))
+            if len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+                _analysis_cache.popitem(last=False)
+        else:
+            _analysis_cache.move_to_end(key)
+        analysis = await task
+        
+        if 'error' in analysis:
+            # Don't keep failures around; the next call should retry
+            _analysis_cache.pop(key, None)
+        return dict(analysis)
+    
+    async def _request_analysis(self, excerpt: str, call_info: Dict) -> Dict:
+        """Ask GPT-4 to analyze one transcript excerpt"""
         analysis_prompt = f"""Analyze this auto service call:
 
 Call Info:
@@ -231,7 +378,7 @@ Call Info:
 - Direction: {call_info.get('call_direction')}
 
 Transcript:
-{transcript[:1000]}...
+{excerpt}
 
 Provide:
 1. summary - Brief summary
@@ -247,23 +394,28 @@ Respond in JSON format."""
             response = await openai_client.chat.completions.create(
                 model="gpt-4-turbo-preview",
                 messages=[
-                    {"role": "system", "content": "You are an automotive service call analyst."},
+                    _ANALYSIS_SYSTEM_MESSAGE,
                     {"role": "user", "content": analysis_prompt}
                 ],
                 temperature=0.3,
-                response_format={"type": "json_object"},
+                response_format=_JSON_RESPONSE_FORMAT,
                 max_tokens=500
             )
             
-            analysis = json.loads(response.choices[0].message.content)
+            analysis = orjson.loads(response.choices[0].message.content)
             return analysis
             
         except Exception as e:
             logger.error(f"   ❌ Analysis failed: {e}")
             return {"error": str(e)}
     
-    async def process_test_call(self, call_data: Dict) -> Dict:
-        """Process a single test call"""
+    async def process_test_call(self, call_data: Dict) -> Tuple[Dict, Optional[Dict]]:
+        """
+        Process a single test call
+        
+        Returns the result and the calls row to write back, or None for the
+        row if the call failed; rows are written together by the caller.
+        """
         call_id = call_data['call_id']
         logger.info(f"\n🔄 Processing: {call_id} - {call_data['customer_name']} ({call_data['duration_seconds']}s)")
         
@@ -274,6 +426,7 @@ Respond in JSON format."""
             'success': False,
             'stages': {}
         }
+        db_row = None
         
         try:
             # Stage 1: Download
@@ -302,18 +455,13 @@ Respond in JSON format."""
             if 'error' not in analysis:
                 logger.info(f"   ✅ Analysis: {analysis.get('category')} - {analysis.get('sentiment')}")
             
-            # Stage 4: Update database
-            try:
-                supabase.table('calls').update({
-                    'status': 'test_analyzed',
-                    'dc_transcript': transcript_data['transcript'][:500],
-                    'dc_sentiment': 0.0
-                }).eq('call_id', call_id).execute()
-                
-                result['stages']['storage'] = 'completed'
-            except Exception as e:
-                result['stages']['storage'] = 'failed'
-                logger.error(f"   Storage error: {e}")
+            # Stage 4: Database row, written in bulk after all calls finish
+            db_row = {
+                'call_id': call_id,
+                'status': 'test_analyzed',
+                'dc_transcript': transcript_data['transcript'][:500],
+                'dc_sentiment': 0.0
+            }
             
             result['success'] = True
             result['analysis'] = analysis
@@ -337,7 +485,23 @@ Respond in JSON format."""
             self.test_results["failed"] += 1
             logger.error(f"❌ Failed: {e}")
         
-        return result
+        return result, db_row
+    
+    def save_analyzed_calls(self, outcomes: List[Tuple[Dict, Optional[Dict]]]):
+        """Write back every analyzed call in one upsert and mark its storage stage"""
+        analyzed = [(result, row) for result, row in outcomes if row]
+        if not analyzed:
+            return
+        
+        try:
+            supabase.table('calls').upsert([row for _, row in analyzed], on_conflict='call_id').execute()
+            stage = 'completed'
+        except Exception as e:
+            stage = 'failed'
+            logger.error(f"   Storage error: {e}")
+        
+        for result, _ in analyzed:
+            result['stages']['storage'] = stage
     
     async def run_comprehensive_test(self, num_calls: int = 5):
         """Run comprehensive test with multiple calls"""
@@ -366,15 +530,18 @@ Respond in JSON format."""
             
             # Step 4: Process calls
             logger.info("\n📋 Step 4: Processing Calls Through Pipeline")
-            results = []
+            # Each call waits on download, Deepgram and OpenAI in turn, so run
+            # several at once; the semaphore keeps us inside API rate limits
+            sem = asyncio.Semaphore(MAX_CONCURRENT_CALLS)
             
-            for i, call in enumerate(test_calls):
-                logger.info(f"\n[{i+1}/{len(test_calls)}] {'='*50}")
-                result = await self.process_test_call(call)
-                results.append(result)
-                
-                if i < len(test_calls) - 1:
-                    await asyncio.sleep(1)
+            async def run(i: int, call: Dict) -> Dict:
+                async with sem:
+                    logger.info(f"\n[{i+1}/{len(test_calls)}] {'='*50}")
+                    return await self.process_test_call(call)
+            
+            outcomes = await asyncio.gather(*(run(i, call) for i, call in enumerate(test_calls)))
+            self.save_analyzed_calls(outcomes)
+            results = [result for result, _ in outcomes]
             
             # Generate report
             logger.info("\n\n📊 TEST REPORT")
@@ -423,25 +590,26 @@ Respond in JSON format."""
             logger.info("\n✅ TEST COMPLETE!")
             
             # Save results
-            with open('test_results.json', 'w') as f:
-                json.dump({
+            with open('test_results.json', 'wb') as f:
+                f.write(orjson.dumps({
                     'timestamp': datetime.now().isoformat(),
                     'results': self.test_results,
                     'call_details': results
-                }, f, indent=2)
+                }, option=orjson.OPT_INDENT_2))
             
             logger.info("📄 Results saved to test_results.json")
             
         except Exception as e:
             logger.error(f"Test error: {e}")
-        finally:
-            await self.client.aclose()
 
 
 async def main():
     """Run the test"""
     tester = MultiCallTester()
-    await tester.run_comprehensive_test(num_calls=5)
+    try:
+        await tester.run_comprehensive_test(num_calls=5)
+    finally:
+        await close_http_client()
 
 
 if __name__ == "__main__":
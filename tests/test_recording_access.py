@@ -2,37 +2,83 @@
 
 import httpx
 import asyncio
+import itertools
+import logging
 import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
 from dotenv import load_dotenv
 
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.utils.retry import aretry
+
 load_dotenv()
 
+# Progress output is debug level; set DEBUG to see every attempt
+log = logging.getLogger(__name__)
+
+# Recording probes in flight at once
+MAX_CONCURRENT_PROBES = 8
+
+# Places a call's recording might live; sid is the CallSid, rid drops its "CA"
+_RECORDING_URL_TEMPLATES = (
+    "https://d3vneafawyd5u6.cloudfront.net/Recordings/{sid}.mp3",
+    "https://d3vneafawyd5u6.cloudfront.net/Recordings/RE{rid}.mp3",
+    "https://d3vneafawyd5u6.cloudfront.net/recordings/{sid}.mp3",
+    "https://autoservice.api.digitalconcierge.io/recordings/{sid}",
+    "https://autoservice.api.digitalconcierge.io/call/{sid}/recording",
+)
+
+# Tokens are reused for this long before logging in again
+TOKEN_TTL_SECONDS = 300
+
+# Username -> (time fetched, token)
+_token_cache: Dict[str, Tuple[float, str]] = {}
+_token_lock = asyncio.Lock()
+
+async def get_token(client: httpx.AsyncClient, username: str, password: str) -> Optional[str]:
+    """Return a DC API token, logging in only when there's no fresh one cached"""
+    async with _token_lock:
+        cached = _token_cache.get(username)
+        if cached and time.time() - cached[0] < TOKEN_TTL_SECONDS:
+            return cached[1]
+        
+        response = await aretry(
+            lambda: client.post(
+                "https://autoservice.api.digitalconcierge.io/auth/authenticate",
+                json={"username": username, "password": password}
+            ),
+            retry_on=(httpx.TransportError,)
+        )
+        if response.status_code != 200:
+            return None
+        
+        token = response.json()["token"]
+        _token_cache[username] = (time.time(), token)
+        return token
+
 async def test_recording_access():
     """Test various approaches to access recordings"""
     
-    # First authenticate
-    async with httpx.AsyncClient() as client:
-        auth_response = await client.post(
-            "https://autoservice.api.digitalconcierge.io/auth/authenticate",
-            json={
-                "username": os.getenv("DASHBOARD_USERNAME"),
-                "password": os.getenv("DASHBOARD_PASSWORD")
-            }
-        )
+    # One pooled HTTP/2 client, so probes to the same host share a connection
+    async with httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        timeout=10.0
+    ) as client:
+        # First authenticate
+        token = await get_token(client, os.getenv("DASHBOARD_USERNAME"), os.getenv("DASHBOARD_PASSWORD"))
         
-        if auth_response.status_code == 200:
-            token = auth_response.json()["token"]
-            print(f"✅ Authenticated successfully")
+        if token:
+            log.debug("✅ Authenticated successfully")
             
             # Try different recording URL patterns
             call_sid = "CAa5cbe57a8f3acfa11b034c41856d9cb7"
-            recording_patterns = [
-                f"https://d3vneafawyd5u6.cloudfront.net/Recordings/{call_sid}.mp3",
-                f"https://d3vneafawyd5u6.cloudfront.net/Recordings/RE{call_sid[2:]}.mp3",
-                f"https://d3vneafawyd5u6.cloudfront.net/recordings/{call_sid}.mp3",
-                f"https://autoservice.api.digitalconcierge.io/recordings/{call_sid}",
-                f"https://autoservice.api.digitalconcierge.io/call/{call_sid}/recording"
-            ]
+            recording_patterns = [t.format(sid=call_sid, rid=call_sid[2:]) for t in _RECORDING_URL_TEMPLATES]
             
             headers_options = [
                 {"x-access-token": token},
@@ -41,26 +87,55 @@ async def test_recording_access():
                 {}
             ]
             
-            for url in recording_patterns:
-                for headers in headers_options:
+            # Run every URL/header combination at once, a few at a time
+            sem = asyncio.Semaphore(MAX_CONCURRENT_PROBES)
+            
+            async def probe(url: str, headers: dict):
+                # HEAD tells us whether the URL works without pulling any body
+                async with sem:
                     try:
-                        print(f"\n🔍 Testing: {url}")
-                        print(f"   Headers: {list(headers.keys())}")
-                        
-                        response = await client.get(url, headers=headers, follow_redirects=True)
-                        print(f"   Status: {response.status_code}")
-                        
-                        if response.status_code == 200:
-                            print(f"   ✅ SUCCESS! Content-Type: {response.headers.get('content-type')}")
-                            print(f"   Size: {len(response.content)} bytes")
-                            return
-                        else:
-                            print(f"   ❌ Failed: {response.text[:100]}")
+                        response = await client.head(url, headers=headers, follow_redirects=True)
+                        if response.status_code == 405:
+                            # No HEAD support; open a GET but close it before the body
+                            async with client.stream("GET", url, headers=headers, follow_redirects=True) as response:
+                                pass
                     except Exception as e:
-                        print(f"   ❌ Error: {e}")
+                        response = e
+                    return url, headers, response
+            
+            # Report probes as they finish and cancel the rest on the first hit
+            tasks = [
+                asyncio.create_task(probe(url, headers))
+                for url, headers in itertools.product(recording_patterns, headers_options)
+            ]
+            
+            for next_done in asyncio.as_completed(tasks):
+                url, headers, response = await next_done
+                log.debug("🔍 Testing: %s", url)
+                log.debug("   Headers: %s", list(headers))
+                
+                if isinstance(response, Exception):
+                    log.debug("   ❌ Error: %s", response)
+                    continue
+                
+                log.debug("   Status: %d", response.status_code)
+                
+                if response.status_code == 200:
+                    print(f"\n✅ SUCCESS! {url}")
+                    print(f"   Headers: {list(headers)}")
+                    print(f"   Content-Type: {response.headers.get('content-type')}")
+                    print(f"   Size: {response.headers.get('content-length', '?')} bytes")
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                    return
+                else:
+                    log.debug("   ❌ Failed: %s", response.reason_phrase)
+            
+            print("\n❌ No recording URL pattern worked")
             
             # Also try to get recording info from the call details
-            print("\n📞 Checking call details endpoint...")
+            log.debug("\n📞 Checking call details endpoint...")
             call_response = await client.get(
                 f"https://autoservice.api.digitalconcierge.io/call/{call_sid}",
                 headers={"x-access-token": token}
@@ -68,9 +143,11 @@ async def test_recording_access():
             
             if call_response.status_code == 200:
                 call_data = call_response.json()
-                print(f"Call data keys: {list(call_data.keys())}")
-                if 'recording' in str(call_data).lower():
-                    print(f"Recording-related fields found: {[k for k in call_data.keys() if 'recording' in k.lower()]}")
+                log.debug("Call data keys: %s", list(call_data.keys()))
+                recording_keys = [k for k in call_data if 'recording' in k.lower()]
+                if recording_keys:
+                    print(f"Recording-related fields found: {recording_keys}")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG if os.getenv("DEBUG") else logging.WARNING, format='%(message)s')
     asyncio.run(test_recording_access())
\ No newline at end of file
@@ -1,12 +1,44 @@
 import asyncio
+import aiofiles
+import hashlib
+import openai
+import orjson
 from openai import AsyncOpenAI
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 from supabase import create_client
-from datetime import datetime
+from datetime import datetime, timezone
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.utils.retry import aretry
 
 load_dotenv()
 
+# OpenAI errors worth another try: network trouble, rate limits, server errors
+OPENAI_RETRYABLE = (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+
+# Whisper transcripts keyed by a hash of the audio
+TRANSCRIPT_CACHE_DIR = Path(".transcripts")
+
+# Transcript characters sent for analysis (roughly 3000 tokens). Longer calls
+# keep their opening and, with the larger share, their ending
+MAX_ANALYSIS_CHARS = 12000
+ANALYSIS_HEAD_SHARE = 1 / 3
+
+# Fixed prompt text, sent as an identical prefix on every request
+_ANALYSIS_SYSTEM = "You are a call center analyst. Analyze the call transcript and provide insights."
+_ANALYSIS_INSTRUCTIONS = """Analyze this phone call transcript and provide:
+1. Call summary (2-3 sentences)
+2. Customer intent/reason for calling
+3. Call outcome
+4. Any follow-up actions needed
+5. Sentiment (positive/neutral/negative)
+6. Call category (appointment, sales_inquiry, service_issue, general_inquiry, missed_opportunity)"""
+
 # Initialize clients
 openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 supabase = create_client(
@@ -14,6 +46,76 @@ supabase = create_client(
     os.getenv("SUPABASE_KEY")
 )
 
+async def update_call(call_id: str, data: dict):
+    """Update a calls row without blocking the event loop"""
+    return await asyncio.to_thread(
+        lambda: supabase.table('calls').update(data).eq('call_id', call_id).execute()
+    )
+
+def analysis_excerpt(transcript: str, segments: list) -> str:
+    """
+    The transcript as sent for analysis
+    
+    Calls within MAX_ANALYSIS_CHARS are sent whole. Longer ones keep whole
+    Whisper segments from the start and from the end (where the outcome and
+    follow-ups usually are) and drop the middle.
+    """
+    if len(transcript) <= MAX_ANALYSIS_CHARS:
+        return transcript
+    
+    head_budget = int(MAX_ANALYSIS_CHARS * ANALYSIS_HEAD_SHARE)
+    texts = [segment['text'].strip() for segment in segments]
+    if not texts:
+        return f"{transcript[:head_budget]} [...] {transcript[head_budget - MAX_ANALYSIS_CHARS:]}"
+    
+    head_end, used = 0, 0
+    while head_end < len(texts) and used + len(texts[head_end]) <= head_budget:
+        used += len(texts[head_end]) + 1
+        head_end += 1
+    
+    tail_start = len(texts)
+    while tail_start > head_end and used + len(texts[tail_start - 1]) <= MAX_ANALYSIS_CHARS:
+        tail_start -= 1
+        used += len(texts[tail_start]) + 1
+    
+    if tail_start == head_end:
+        return " ".join(texts)
+    return " ".join(texts[:head_end] + ["[...]"] + texts[tail_start:])
+
+async def transcribe_cached(audio_file: str) -> dict:
+    """
+    Whisper transcript ({'text', 'segments'}) for an audio file
+    
+    Transcripts are cached under TRANSCRIPT_CACHE_DIR by a hash of the audio
+    bytes, so re-running on the same recording skips the API call.
+    """
+    async with aiofiles.open(audio_file, "rb") as f:
+        data = await f.read()
+    
+    cache_path = TRANSCRIPT_CACHE_DIR / f"{hashlib.blake2b(data, digest_size=16).hexdigest()}.json"
+    if cache_path.exists():
+        print("🔁 Using cached transcript")
+        async with aiofiles.open(cache_path, "rb") as f:
+            return orjson.loads(await f.read())
+    
+    transcription = await aretry(
+        lambda: openai_client.audio.transcriptions.create(
+            model="whisper-1",
+            file=(os.path.basename(audio_file), data, "audio/mpeg"),
+            response_format="verbose_json"
+        ),
+        retry_on=OPENAI_RETRYABLE
+    )
+    result = {
+        'text': transcription.text,
+        'segments': getattr(transcription, 'segments', None) or []
+    }
+    
+    TRANSCRIPT_CACHE_DIR.mkdir(exist_ok=True)
+    async with aiofiles.open(cache_path, "wb") as f:
+        await f.write(orjson.dumps(result))
+    return result
+
 async def transcribe_audio():
     """Test transcribing the downloaded audio file"""
     
@@ -22,65 +124,53 @@ async def transcribe_audio():
     
     print(f"Transcribing {audio_file}...")
     
+    # UTC throughout, so the stored timestamps sort consistently
+    started = datetime.now(timezone.utc).isoformat()
+    
     try:
-        # Open and transcribe the audio file
-        with open(audio_file, "rb") as f:
-            transcript = await openai_client.audio.transcriptions.create(
-                model="whisper-1",
-                file=f,
-                response_format="text"
-            )
+        # Transcribe the audio file, or reuse an earlier transcript of it
+        transcription = await transcribe_cached(audio_file)
+        
+        # The full text is stored; long calls are trimmed for the analysis
+        transcript = transcription['text']
+        segments = transcription['segments']
         
         print(f"\n✅ Transcription successful!")
         print(f"\nTranscript:\n{transcript}")
         
-        # Update call record with transcript
-        update_data = {
-            'transcript': transcript,
-            'status': 'transcribed',
-            'transcribed_at': datetime.now().isoformat()
-        }
-        
-        result = supabase.table('calls').update(update_data).eq('call_id', call_id).execute()
-        
-        if result.data:
-            print(f"\n✅ Updated call record with transcript")
-        
         # Now analyze with AI
         print("\n📊 Analyzing call with AI...")
         
-        analysis_prompt = f"""Analyze this phone call transcript and provide:
-1. Call summary (2-3 sentences)
-2. Customer intent/reason for calling
-3. Call outcome
-4. Any follow-up actions needed
-5. Sentiment (positive/neutral/negative)
-6. Call category (appointment, sales_inquiry, service_issue, general_inquiry, missed_opportunity)
-
-Transcript:
-{transcript}
-"""
+        analysis_prompt = f"{_ANALYSIS_INSTRUCTIONS}\n\nTranscript:\n{analysis_excerpt(transcript, segments)}\n"
         
-        response = await openai_client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=[
-                {"role": "system", "content": "You are a call center analyst. Analyze the call transcript and provide insights."},
-                {"role": "user", "content": analysis_prompt}
-            ],
-            temperature=0.3
+        response = await aretry(
+            lambda: openai_client.chat.completions.create(
+                model="gpt-4-turbo-preview",
+                messages=[
+                    {"role": "system", "content": _ANALYSIS_SYSTEM},
+                    {"role": "user", "content": analysis_prompt}
+                ],
+                temperature=0.3
+            ),
+            retry_on=OPENAI_RETRYABLE
         )
         
         analysis = response.choices[0].message.content
         print(f"\nAI Analysis:\n{analysis}")
         
-        # Update with analysis
+        # Save transcript and analysis together in one update
         update_data = {
+            'transcript': transcript,
             'ai_analysis': analysis,
             'status': 'analyzed',
-            'analyzed_at': datetime.now().isoformat()
+            'transcribed_at': started,
+            'analyzed_at': datetime.now(timezone.utc).isoformat()
         }
         
-        result = supabase.table('calls').update(update_data).eq('call_id', call_id).execute()
+        result = await update_call(call_id, update_data)
+        
+        if result.data:
+            print(f"\n✅ Updated call record with transcript and analysis")
         
         print(f"\n✅ Complete! Call {call_id} has been fully processed.")
         